@@ -1,6 +1,6 @@
 from flask import Flask, jsonify
 from flask_cors import CORS
-from models import db, Demand, Inventory, Supplier
+from models import db, StockBySkuRegion, Supplier
 from routes.upload_routes import upload_bp
 from routes.simulate_routes import simulate_bp
 from routes.production_routes import production_bp
@@ -13,24 +13,27 @@ from routes.optimization_routes import optimization_bp
 from routes.whatif_routes import whatif_bp
 from routes.kpi_routes import kpi_bp
 from routes.reset_routes import reset_bp
-import os
+from routes.job_routes import job_bp
+from config import Config
+from utils.cache import cached_response
+from utils.db_setup import engine_options, register_sqlite_pragmas
 from flask_migrate import Migrate  
 
 app = Flask(__name__)
 CORS(app, resources={r"/api/*": {"origins": "*"}})  # allow React frontend requests
 
 # ---------------- DATABASE CONFIG ----------------
-BASE_DIR = os.path.abspath(os.path.dirname(__file__))
-DB_PATH = os.path.join(BASE_DIR, "freshbites.db")
-
-app.config["SQLALCHEMY_DATABASE_URI"] = f"sqlite:///{DB_PATH}"
+app.config["SQLALCHEMY_DATABASE_URI"] = Config.DATABASE_URL
 app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
+app.config["SQLALCHEMY_ENGINE_OPTIONS"] = engine_options(Config)  # pool sizing / timeouts
 
 # ✅ Init DB + Migrations
 db.init_app(app)
 migrate = Migrate(app, db)
 
 with app.app_context():
+    # WAL etc. so dashboards keep reading while an upload writes
+    register_sqlite_pragmas(db.engine, Config)
     db.create_all()
 
 # ---------------- REGISTER ROUTES ----------------
@@ -46,6 +49,7 @@ app.register_blueprint(optimization_bp, url_prefix="/api")
 app.register_blueprint(whatif_bp, url_prefix="/api")
 app.register_blueprint(kpi_bp, url_prefix="/api")
 app.register_blueprint(reset_bp, url_prefix="/api")
+app.register_blueprint(job_bp, url_prefix="/api")
 
 # ---------------- ROOT ----------------
 @app.route("/")
@@ -54,14 +58,11 @@ def home():
 
 # ---------------- STOCK API ----------------
 @app.route("/api/stock")
+@cached_response
 def get_stock():
     stock = (
-        db.session.query(
-            Inventory.region,
-            Inventory.sku,
-            db.func.sum(Inventory.stock).label("Stock_Level")
-        )
-        .group_by(Inventory.region, Inventory.sku)
+        db.session.query(StockBySkuRegion.region, StockBySkuRegion.sku, StockBySkuRegion.stock)
+        .order_by(StockBySkuRegion.region, StockBySkuRegion.sku)
         .all()
     )
 
@@ -73,6 +74,7 @@ def get_stock():
 
 # ---------------- SUPPLIER API ----------------
 @app.route("/api/suppliers")
+@cached_response
 def get_suppliers():
     """
     Returns supplier reliability and SLA performance.
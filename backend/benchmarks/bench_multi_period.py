@@ -0,0 +1,71 @@
+# benchmarks/bench_multi_period.py
+"""
+Build and solve times of the multi-period production plan
+(utils/multi_period.py) on a synthetic catalogue: the min-cost flow path,
+then the LP with each solver.
+
+    python benchmarks/bench_multi_period.py --skus 2000 --plants 20 --weeks 52
+"""
+import argparse
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from utils.multi_period import PLAN_SOLVER, solve_horizon  # noqa: E402
+
+
+def synthetic(skus, plants, weeks, plants_per_sku, load, seed=7):
+    """Frames shaped like load_horizon(), with seasonal demand at `load` × total capacity on average."""
+    rng = np.random.default_rng(seed)
+    sku = np.char.add("SKU-", np.arange(skus).astype(str))
+    plant = np.char.add("Plant-", np.arange(plants).astype(str))
+    week = np.arange(1, weeks + 1)
+
+    lines = pd.DataFrame({
+        "Plant": np.concatenate([rng.choice(plant, plants_per_sku, replace=False) for _ in range(skus)]),
+        "SKU": np.repeat(sku, plants_per_sku),
+    })
+    base = rng.integers(50, 500, skus)
+    season = 1 + 0.4 * np.sin(2 * np.pi * (week[None, :] + rng.integers(0, 52, skus)[:, None]) / 52)
+    forecast = rng.poisson(base[:, None] * season)
+    demand = pd.DataFrame({"SKU": np.repeat(sku, weeks), "Week": np.tile(week, skus), "Forecast": forecast.ravel()})
+
+    # Plant capacity sized so the average week runs at `load`
+    spread = rng.uniform(0.7, 1.3, plants)
+    weekly = np.floor(base.sum() / load * spread / spread.sum())
+    capacity = pd.DataFrame(np.repeat(weekly[:, None], weeks, axis=1), index=pd.Index(plant), columns=week)
+    lines["Capacity"] = lines["Plant"].map(capacity[week[0]])
+    stock = pd.DataFrame({"SKU": sku, "Stock": rng.integers(0, 300, skus)})
+    return week, lines, capacity, demand, stock
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--skus", type=int, default=2000)
+    parser.add_argument("--plants", type=int, default=20)
+    parser.add_argument("--weeks", type=int, default=52)
+    parser.add_argument("--plants-per-sku", type=int, default=2)
+    parser.add_argument("--load", type=float, default=0.95, help="average demand / capacity")
+    parser.add_argument("--solvers", default="highs,glop", help="comma-separated LP solvers (highs, glop, pdlp)")
+    parser.add_argument("--time-limit", type=float, default=120)
+    args = parser.parse_args()
+
+    weeks, lines, capacity, demand, stock = synthetic(args.skus, args.plants, args.weeks, args.plants_per_sku, args.load)
+    print(f"{len(lines):,} plant lines × {len(weeks)} weeks, {args.skus:,} SKUs, load {args.load:.0%}\n")
+
+    # network_first=False forces the LP, for a like-for-like comparison with the flow path
+    runs = [("flow", PLAN_SOLVER, True)] + [(name.strip(), name.strip(), False) for name in args.solvers.split(",")]
+    print(f"{'run':<8}{'solver':>15}{'status':>16}{'variables':>11}{'nonzeros':>11}{'build':>9}{'solve':>10}{'objective':>16}{'end backlog':>14}")
+    for label, name, network_first in runs:
+        _, _, report = solve_horizon(weeks, lines, capacity, demand, stock, solver_name=name,
+                                     time_limit=args.time_limit, network_first=network_first)
+        print(f"{label:<8}{report['solver']:>15}{report['status']:>16}{report['variables']:>11,}{report['nonzeros']:>11,}"
+              f"{report['build_seconds']:>8.2f}s{report['solve_seconds']:>9.2f}s"
+              f"{report.get('objective', float('nan')):>16,.2f}{report.get('ending_backlog', float('nan')):>14,.2f}")
+
+
+if __name__ == "__main__":
+    main()
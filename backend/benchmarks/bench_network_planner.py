@@ -0,0 +1,93 @@
+# benchmarks/bench_network_planner.py
+"""
+Build and solve times of the supplier → plant → region network planner
+(utils/network_planner.py) on a synthetic network: the min-cost flow path,
+then the LP with each solver.
+
+    python benchmarks/bench_network_planner.py --skus 1000 --plants 40 --regions 300
+"""
+import argparse
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from utils.network_planner import NETWORK_SOLVER, solve_network  # noqa: E402
+
+
+def synthetic(skus, plants, regions, suppliers_per_sku, plants_per_sku, regions_per_sku, seed=7):
+    """Frames shaped like load_network(): links, lines, needs and a lane file for every pair used."""
+    rng = np.random.default_rng(seed)
+    sku = np.char.add("SKU-", np.arange(skus).astype(str))
+    plant = np.char.add("Plant-", np.arange(plants).astype(str))
+    region = np.char.add("Region-", np.arange(regions).astype(str))
+
+    links = pd.DataFrame({
+        "Supplier_ID": np.char.add("S", rng.integers(0, max(skus * suppliers_per_sku // 3, 1), skus * suppliers_per_sku).astype(str)),
+        "SKU": np.repeat(sku, suppliers_per_sku),
+        "Unit_Cost": rng.uniform(5, 50, skus * suppliers_per_sku).round(2),
+        "Max_Capacity": rng.integers(2000, 10_000, skus * suppliers_per_sku),
+        "Lead_Time_Days": rng.integers(2, 30, skus * suppliers_per_sku),
+    })
+    lines = pd.DataFrame({
+        "Plant": np.concatenate([rng.choice(plant, plants_per_sku, replace=False) for _ in range(skus)]),
+        "SKU": np.repeat(sku, plants_per_sku),
+    })
+    capacity = pd.Series(rng.integers(200_000, 800_000, plants), index=plant)
+    lines["Capacity"] = lines["Plant"].map(capacity)
+    needs = pd.DataFrame({
+        "Region": np.concatenate([rng.choice(region, regions_per_sku, replace=False) for _ in range(skus)]),
+        "SKU": np.repeat(sku, regions_per_sku),
+        "Need": rng.integers(0, 400, skus * regions_per_sku).astype(float),
+    })
+    needs = needs[needs["Need"] > 0]
+
+    # Freight: distance-like costs on a random plane
+    where = {name: xy for name, xy in zip(np.concatenate([plant, region]), rng.uniform(0, 10, (plants + regions, 2)))}
+    suppliers = links["Supplier_ID"].unique()
+    where.update({name: xy for name, xy in zip(suppliers, rng.uniform(0, 10, (len(suppliers), 2)))})
+    pairs = pd.concat([
+        links[["Supplier_ID"]].drop_duplicates().merge(pd.DataFrame({"To": plant}), how="cross")
+            .rename(columns={"Supplier_ID": "From"}),
+        pd.DataFrame({"From": plant}).merge(pd.DataFrame({"To": region}), how="cross"),
+    ], ignore_index=True)
+    origin = np.array([where[name] for name in pairs["From"]])
+    destination = np.array([where[name] for name in pairs["To"]])
+    lanes = pairs.assign(Cost=np.hypot(*(origin - destination).T).round(2))
+    lanes = lanes.assign(From=lanes["From"].str.title(), To=lanes["To"].str.title())
+    return links, lines, needs, lanes
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--skus", type=int, default=1000)
+    parser.add_argument("--plants", type=int, default=40)
+    parser.add_argument("--regions", type=int, default=300)
+    parser.add_argument("--suppliers-per-sku", type=int, default=4)
+    parser.add_argument("--plants-per-sku", type=int, default=3)
+    parser.add_argument("--regions-per-sku", type=int, default=60)
+    parser.add_argument("--solvers", default="highs,glop", help="comma-separated LP solvers (highs, glop, pdlp)")
+    parser.add_argument("--capacity-scale", type=float, default=1.0, help="plant capacity multiplier; < 1 makes it bind")
+    parser.add_argument("--time-limit", type=float, default=120)
+    args = parser.parse_args()
+
+    links, lines, needs, lanes = synthetic(args.skus, args.plants, args.regions, args.suppliers_per_sku,
+                                           args.plants_per_sku, args.regions_per_sku)
+    lines["Capacity"] = lines["Capacity"] * args.capacity_scale
+    print(f"{len(links):,} supplier links, {len(lines):,} plant lines, {len(needs):,} region needs\n")
+
+    # network_first=False forces the LP, for a like-for-like comparison with the flow path
+    runs = [("flow", NETWORK_SOLVER, True)] + [(name.strip(), name.strip(), False) for name in args.solvers.split(",")]
+    print(f"{'run':<8}{'solver':>15}{'status':>16}{'nodes':>8}{'arcs':>10}{'build':>9}{'solve':>10}{'total cost':>18}{'shortfall':>14}")
+    for label, name, network_first in runs:
+        _, _, report = solve_network(links, lines, needs, lanes, solver_name=name, time_limit=args.time_limit,
+                                     network_first=network_first)
+        print(f"{label:<8}{report['solver']:>15}{report['status']:>16}{report['nodes']:>8,}{report['arcs']:>10,}"
+              f"{report['build_seconds']:>8.2f}s{report['solve_seconds']:>9.2f}s"
+              f"{report.get('total_cost', float('nan')):>18,.2f}{report.get('shortfall', float('nan')):>14,.2f}")
+
+
+if __name__ == "__main__":
+    main()
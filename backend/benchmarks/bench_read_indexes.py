@@ -0,0 +1,112 @@
+# benchmarks/bench_read_indexes.py
+"""
+Before/after timings of the hot read queries with and without the
+composite covering indexes declared in models.py.
+
+    python benchmarks/bench_read_indexes.py --rows 1000000
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+import sqlalchemy as sa
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from models import Demand, Inventory  # noqa: E402
+
+demand, inventory = Demand.__table__, Inventory.__table__
+
+QUERIES = {
+    "GET /demand (week, region, sku)": sa.select(
+        demand.c.week, demand.c.region, demand.c.sku,
+        sa.func.sum(demand.c.forecast), sa.func.sum(demand.c.actual),
+    ).group_by(demand.c.week, demand.c.region, demand.c.sku),
+    "simulate_demand (sku, region filter)": sa.select(
+        demand.c.week, demand.c.region, demand.c.sku,
+        sa.func.sum(demand.c.forecast), sa.func.sum(demand.c.actual),
+    ).where(demand.c.sku == "SKU-007", demand.c.region == "Delhi")
+     .group_by(demand.c.week, demand.c.region, demand.c.sku).order_by(demand.c.week),
+    "demand by sku, region": sa.select(
+        demand.c.sku, demand.c.region, sa.func.sum(demand.c.forecast),
+    ).group_by(demand.c.sku, demand.c.region),
+    "demand by sku": sa.select(
+        demand.c.sku, sa.func.sum(demand.c.forecast),
+    ).group_by(demand.c.sku),
+    "stock by region, sku": sa.select(
+        inventory.c.region, inventory.c.sku, sa.func.sum(inventory.c.stock),
+    ).group_by(inventory.c.region, inventory.c.sku),
+    "stock by sku, region": sa.select(
+        inventory.c.sku, inventory.c.region, sa.func.sum(inventory.c.stock),
+    ).group_by(inventory.c.sku, inventory.c.region),
+}
+
+
+def synthetic(rows, skus=200, regions=("Mumbai", "Delhi", "Bangalore", "Kolkata", "Chennai", "Hyderabad")):
+    rng = np.random.default_rng(7)
+    frame = pd.DataFrame({
+        "week": rng.integers(1, 53, rows),
+        "sku": np.char.add("SKU-", np.char.zfill(rng.integers(1, skus + 1, rows).astype(str), 3)),
+        "region": rng.choice(regions, rows),
+    })
+    return (
+        frame.assign(forecast=rng.integers(0, 2000, rows), actual=rng.integers(0, 2000, rows)),
+        frame.assign(stock=rng.integers(0, 3000, rows), forecast=0),
+    )
+
+
+def time_queries(engine, repeat):
+    timings = {}
+    with engine.connect() as conn:
+        for name, query in QUERIES.items():
+            best = float("inf")
+            for _ in range(repeat):
+                started = time.perf_counter()
+                conn.execute(query).fetchall()
+                best = min(best, time.perf_counter() - started)
+            timings[name] = best
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=1_000_000, help="rows per table")
+    parser.add_argument("--repeat", type=int, default=3, help="runs per query (best is reported)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = sa.create_engine(f"sqlite:///{os.path.join(tmp, 'bench.db')}")
+        # Tables without their indexes first
+        for table in (demand, inventory):
+            sa.Table(table.name, sa.MetaData(), *(c._copy() for c in table.columns)).create(engine)
+
+        demand_rows, inventory_rows = synthetic(args.rows)
+        started = time.perf_counter()
+        with engine.begin() as conn:
+            demand_rows.to_sql(demand.name, conn, if_exists="append", index=False, chunksize=50_000)
+            inventory_rows.to_sql(inventory.name, conn, if_exists="append", index=False, chunksize=50_000)
+        print(f"Loaded {args.rows:,} demand + {args.rows:,} inventory rows in {time.perf_counter() - started:.1f}s")
+
+        before = time_queries(engine, args.repeat)
+
+        started = time.perf_counter()
+        for table in (demand, inventory):
+            for index in table.indexes:
+                index.create(engine)
+        with engine.begin() as conn:
+            conn.exec_driver_sql("ANALYZE")
+        print(f"Built indexes in {time.perf_counter() - started:.1f}s\n")
+
+        after = time_queries(engine, args.repeat)
+        engine.dispose()
+
+    print(f"{'query':<40}{'no index':>12}{'indexed':>12}{'speedup':>10}")
+    for name in QUERIES:
+        print(f"{name:<40}{before[name] * 1000:>10.1f}ms{after[name] * 1000:>10.1f}ms{before[name] / after[name]:>9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,66 @@
 import os
+import tempfile
 from dotenv import load_dotenv
 
 # Load .env variables
 load_dotenv()
 
+BASE_DIR = os.path.abspath(os.path.dirname(__file__))
+
 class Config:
     FLASK_ENV = os.getenv("FLASK_ENV", "development")
     CSV_PATH = os.getenv("CSV_PATH", os.path.join(os.path.dirname(__file__), "data", "FreshBites_SupplyChain_Data.csv"))
     PORT = int(os.getenv("PORT", 8000))
+
+    # ---------------- Database ----------------
+    DATABASE_URL = os.getenv("DATABASE_URL", f"sqlite:///{os.path.join(BASE_DIR, 'freshbites.db')}")
+
+    # SQLite pragmas, applied to every new connection
+    SQLITE_JOURNAL_MODE = os.getenv("SQLITE_JOURNAL_MODE", "WAL")     # readers don't block on writers
+    SQLITE_SYNCHRONOUS = os.getenv("SQLITE_SYNCHRONOUS", "NORMAL")    # durable at checkpoints in WAL mode
+    SQLITE_MMAP_SIZE = int(os.getenv("SQLITE_MMAP_SIZE", 256 * 1024 * 1024))  # bytes
+    SQLITE_CACHE_SIZE = int(os.getenv("SQLITE_CACHE_SIZE", -64000))   # negative = KiB (64 MB)
+    SQLITE_BUSY_TIMEOUT_MS = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", 15000))
+
+    # Connection pool, per engine (i.e. per gunicorn worker)
+    DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", 5))
+    DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", 10))
+    DB_POOL_TIMEOUT = int(os.getenv("DB_POOL_TIMEOUT", 30))           # seconds to wait for a connection
+    DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", 1800))         # seconds (server databases)
+
+    # ---------------- Response cache ----------------
+    # Shared on-disk store so every gunicorn worker serves the same cached reads
+    RESPONSE_CACHE_PATH = os.getenv("RESPONSE_CACHE_PATH", os.path.join(tempfile.gettempdir(), "freshbites_response_cache.sqlite"))
+    RESPONSE_CACHE_MAX_MB = int(os.getenv("RESPONSE_CACHE_MAX_MB", 64))   # LRU bound; 0 disables
+
+    # ---------------- Forecasting ----------------
+    FORECAST_CACHE_SIZE = int(os.getenv("FORECAST_CACHE_SIZE", 256))      # fitted models kept per worker
+    FORECAST_CACHE_TTL = int(os.getenv("FORECAST_CACHE_TTL", 3600))       # seconds a fit stays valid
+    FORECAST_WORKERS = int(os.getenv("FORECAST_WORKERS", min(4, os.cpu_count() or 1)))  # batch fit processes
+    AUTO_ARIMA_BUDGET = float(os.getenv("AUTO_ARIMA_BUDGET", 10))        # seconds per series for the order search
+    AUTO_ARIMA_CACHE_SIZE = int(os.getenv("AUTO_ARIMA_CACHE_SIZE", 64))  # order selections kept per worker
+
+    # ---------------- Uploads ----------------
+    INGEST_CHUNK_SIZE = int(os.getenv("INGEST_CHUNK_SIZE", 50000))       # rows parsed and inserted per round trip
+    LOADER_WORKERS = int(os.getenv("LOADER_WORKERS", 4))                 # parallel parsers for multi-file /upload
+
+    # ---------------- Background jobs ----------------
+    # Per API process; solver jobs get their own, smaller pool so long solves never hold up uploads
+    JOB_WORKERS = int(os.getenv("JOB_WORKERS", 2))
+    JOB_UPLOAD_FOLDER = os.getenv("JOB_UPLOAD_FOLDER", os.path.join(tempfile.gettempdir(), "freshbites_jobs"))
+    SOLVER_JOB_WORKERS = int(os.getenv("SOLVER_JOB_WORKERS", 1))
+    SOLVER_JOB_QUEUE = int(os.getenv("SOLVER_JOB_QUEUE", 4))             # solver jobs that may wait per process
+    CANCEL_POLL_SECONDS = float(os.getenv("CANCEL_POLL_SECONDS", 0.5))   # how often running jobs check for a cancel
+
+    # ---------------- Optimization ----------------
+    ALLOCATION_WORKERS = int(os.getenv("ALLOCATION_WORKERS", min(4, os.cpu_count() or 1)))  # component solve processes
+    SOURCING_GAP = float(os.getenv("SOURCING_GAP", 0.005))               # relative MIP gap when total capacity binds
+    SOURCING_TIME_LIMIT = float(os.getenv("SOURCING_TIME_LIMIT", 10))    # seconds; best plan so far is returned
+    PLAN_HORIZON = int(os.getenv("PLAN_HORIZON", 52))                    # weeks in a multi-period production plan
+    PLAN_HOLDING_COST = float(os.getenv("PLAN_HOLDING_COST", 0.1))       # per unit carried into the next week
+    PLAN_BACKLOG_COST = float(os.getenv("PLAN_BACKLOG_COST", 1.0))       # per unit owed per week
+    PLAN_TIME_LIMIT = float(os.getenv("PLAN_TIME_LIMIT", 30))            # seconds for the multi-period LP (fractional data)
+    # CSV of transfer lanes (From, To, Cost[, Lead_Time]): region-to-region for /rebalance (unset = uniform lanes),
+    # plus supplier/plant lanes for /network_plan freight. Re-read when its mtime changes; cached /rebalance
+    # responses key on that mtime too.
+    REGION_LANES_PATH = os.getenv("REGION_LANES_PATH", "")
@@ -0,0 +1,35 @@
+"""composite covering indexes for the hot GROUP BY paths
+
+Revision ID: 3859de7ef892
+Revises:
+Create Date: 2026-10-17 09:12:40.118204
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3859de7ef892'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Databases created after this revision already have these from db.create_all()
+    op.create_index('ix_demand_sku_region_week', 'demand',
+                    ['sku', 'region', 'week', 'forecast', 'actual'], if_not_exists=True)
+    op.create_index('ix_demand_week_region_sku', 'demand',
+                    ['week', 'region', 'sku', 'forecast', 'actual'], if_not_exists=True)
+    op.create_index('ix_inventory_sku_region_week', 'inventory',
+                    ['sku', 'region', 'week', 'stock'], if_not_exists=True)
+    op.create_index('ix_suppliers_supplier_id', 'suppliers',
+                    ['supplier_id'], if_not_exists=True)
+
+
+def downgrade():
+    op.drop_index('ix_suppliers_supplier_id', table_name='suppliers', if_exists=True)
+    op.drop_index('ix_inventory_sku_region_week', table_name='inventory', if_exists=True)
+    op.drop_index('ix_demand_week_region_sku', table_name='demand', if_exists=True)
+    op.drop_index('ix_demand_sku_region_week', table_name='demand', if_exists=True)
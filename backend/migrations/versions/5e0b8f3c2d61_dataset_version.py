@@ -0,0 +1,28 @@
+"""dataset version counter for the response cache
+
+Revision ID: 5e0b8f3c2d61
+Revises: a41c2e9d7b10
+Create Date: 2026-10-17 13:05:21.904412
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5e0b8f3c2d61'
+down_revision = 'a41c2e9d7b10'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Databases created after this revision already have it from db.create_all()
+    if 'dataset_version' not in sa.inspect(op.get_bind()).get_table_names():
+        op.create_table('dataset_version',
+                        sa.Column('id', sa.Integer(), primary_key=True),
+                        sa.Column('version', sa.Integer(), nullable=False))
+
+
+def downgrade():
+    op.drop_table('dataset_version')
@@ -0,0 +1,37 @@
+"""demand_forecast table for batch forecasts
+
+Revision ID: 8d27c4f1a9e3
+Revises: 5e0b8f3c2d61
+Create Date: 2026-10-17 14:22:47.310958
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8d27c4f1a9e3'
+down_revision = '5e0b8f3c2d61'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Databases created after this revision already have it from db.create_all()
+    if 'demand_forecast' not in sa.inspect(op.get_bind()).get_table_names():
+        op.create_table('demand_forecast',
+                        sa.Column('id', sa.Integer(), primary_key=True),
+                        sa.Column('sku', sa.String(length=50), nullable=False),
+                        sa.Column('region', sa.String(length=50), nullable=False),
+                        sa.Column('week', sa.Integer(), nullable=False),
+                        sa.Column('step', sa.Integer(), nullable=False),
+                        sa.Column('forecast', sa.Float(), nullable=False),
+                        sa.Column('method', sa.String(length=30), nullable=False),
+                        sa.Column('created_at', sa.DateTime(), nullable=False))
+        op.create_index('ix_demand_forecast_sku_region_week', 'demand_forecast',
+                        ['sku', 'region', 'week'])
+
+
+def downgrade():
+    op.drop_index('ix_demand_forecast_sku_region_week', table_name='demand_forecast')
+    op.drop_table('demand_forecast')
@@ -0,0 +1,54 @@
+"""pre-aggregated summary tables for the dashboard reads
+
+Revision ID: a41c2e9d7b10
+Revises: 3859de7ef892
+Create Date: 2026-10-17 11:40:05.532871
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a41c2e9d7b10'
+down_revision = '3859de7ef892'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Databases created after this revision already have these from db.create_all()
+    existing = sa.inspect(op.get_bind()).get_table_names()
+    if 'demand_by_sku' not in existing:
+        op.create_table('demand_by_sku',
+                        sa.Column('sku', sa.String(length=50), primary_key=True),
+                        sa.Column('forecast', sa.BigInteger(), nullable=True),
+                        sa.Column('actual', sa.BigInteger(), nullable=True))
+    if 'demand_by_sku_region' not in existing:
+        op.create_table('demand_by_sku_region',
+                        sa.Column('sku', sa.String(length=50), primary_key=True),
+                        sa.Column('region', sa.String(length=50), primary_key=True),
+                        sa.Column('forecast', sa.BigInteger(), nullable=True),
+                        sa.Column('actual', sa.BigInteger(), nullable=True))
+    if 'stock_by_sku_region' not in existing:
+        op.create_table('stock_by_sku_region',
+                        sa.Column('sku', sa.String(length=50), primary_key=True),
+                        sa.Column('region', sa.String(length=50), primary_key=True),
+                        sa.Column('stock', sa.BigInteger(), nullable=True))
+
+    # Backfill from the raw tables
+    op.execute("DELETE FROM demand_by_sku")
+    op.execute("INSERT INTO demand_by_sku (sku, forecast, actual) "
+               "SELECT sku, SUM(forecast), SUM(actual) FROM demand GROUP BY sku")
+    op.execute("DELETE FROM demand_by_sku_region")
+    op.execute("INSERT INTO demand_by_sku_region (sku, region, forecast, actual) "
+               "SELECT sku, region, SUM(forecast), SUM(actual) FROM demand GROUP BY sku, region")
+    op.execute("DELETE FROM stock_by_sku_region")
+    op.execute("INSERT INTO stock_by_sku_region (sku, region, stock) "
+               "SELECT sku, region, SUM(stock) FROM inventory GROUP BY sku, region")
+
+
+def downgrade():
+    op.drop_table('stock_by_sku_region')
+    op.drop_table('demand_by_sku_region')
+    op.drop_table('demand_by_sku')
@@ -0,0 +1,25 @@
+"""index suppliers by sku_linked for sourcing lookups
+
+Revision ID: c7a1e5f90b34
+Revises: 8d27c4f1a9e3
+Create Date: 2026-10-17 16:05:12.482917
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c7a1e5f90b34'
+down_revision = '8d27c4f1a9e3'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Databases created after this revision already have it from db.create_all()
+    op.create_index('ix_suppliers_sku_linked', 'suppliers', ['sku_linked'], if_not_exists=True)
+
+
+def downgrade():
+    op.drop_index('ix_suppliers_sku_linked', table_name='suppliers', if_exists=True)
@@ -0,0 +1,34 @@
+"""jobs table for background jobs
+
+Revision ID: e2b94f0c7d15
+Revises: c7a1e5f90b34
+Create Date: 2026-10-17 18:31:09.645120
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e2b94f0c7d15'
+down_revision = 'c7a1e5f90b34'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Databases created after this revision already have it from db.create_all()
+    if 'jobs' not in sa.inspect(op.get_bind()).get_table_names():
+        op.create_table('jobs',
+                        sa.Column('id', sa.String(length=32), primary_key=True),
+                        sa.Column('kind', sa.String(length=50), nullable=False),
+                        sa.Column('status', sa.String(length=20), nullable=False),
+                        sa.Column('progress', sa.JSON(), nullable=True),
+                        sa.Column('result', sa.JSON(), nullable=True),
+                        sa.Column('error', sa.Text(), nullable=True),
+                        sa.Column('created_at', sa.DateTime(), nullable=False),
+                        sa.Column('updated_at', sa.DateTime(), nullable=False))
+
+
+def downgrade():
+    op.drop_table('jobs')
@@ -1,10 +1,18 @@
 # backend/models.py
+from datetime import datetime
 from flask_sqlalchemy import SQLAlchemy
 
 db = SQLAlchemy()
 
 class Demand(db.Model):
     __tablename__ = "demand"
+    __table_args__ = (
+        # Covering indexes: GROUP BY sku[, region[, week]] and sku/region lookups
+        db.Index("ix_demand_sku_region_week", "sku", "region", "week", "forecast", "actual"),
+        # GET /demand groups by week, region, sku
+        db.Index("ix_demand_week_region_sku", "week", "region", "sku", "forecast", "actual"),
+    )
+    natural_key = ("week", "sku", "region")  # upsert uploads merge on this
     id = db.Column(db.Integer, primary_key=True)
     week = db.Column(db.Integer, nullable=True)  # make optional (some CSVs may not have)
     sku = db.Column(db.String(50), nullable=False)
@@ -23,6 +31,10 @@ class Production(db.Model):
 
 class Inventory(db.Model):
     __tablename__ = "inventory"
+    __table_args__ = (
+        db.Index("ix_inventory_sku_region_week", "sku", "region", "week", "stock"),
+    )
+    natural_key = ("week", "sku", "region")
     id = db.Column(db.Integer, primary_key=True)
     week = db.Column(db.Integer, nullable=True)
     sku = db.Column(db.String(50), nullable=False)
@@ -32,6 +44,13 @@ class Inventory(db.Model):
 
 class Supplier(db.Model):
     __tablename__ = "suppliers"
+    __table_args__ = (
+        db.Index("ix_suppliers_supplier_id", "supplier_id"),
+        db.Index("ix_suppliers_sku_linked", "sku_linked"),
+    )
+    # One row per supplier × SKU link, so upserts replace a supplier's rows as a group
+    natural_key = ("supplier_id",)
+    natural_key_groups = True
 
     # Primary key
     id = db.Column(db.Integer, primary_key=True)
@@ -57,3 +76,65 @@ class Supplier(db.Model):
     reorder_point = db.Column(db.Integer, nullable=True)      # threshold to reorder
 
 
+# ---------------- Batch forecasts ----------------
+# One row per (sku, region, future week), written by /forecast_batch
+class DemandForecast(db.Model):
+    __tablename__ = "demand_forecast"
+    __table_args__ = (
+        db.Index("ix_demand_forecast_sku_region_week", "sku", "region", "week"),
+    )
+    id = db.Column(db.Integer, primary_key=True)
+    sku = db.Column(db.String(50), nullable=False)
+    region = db.Column(db.String(50), nullable=False)
+    week = db.Column(db.Integer, nullable=False)       # last observed week + step
+    step = db.Column(db.Integer, nullable=False)       # 1..periods ahead
+    forecast = db.Column(db.Float, nullable=False)
+    method = db.Column(db.String(30), nullable=False)  # e.g. "arima(1,1,1)"
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+
+# ---------------- Dataset version ----------------
+# Single row, bumped in every transaction that changes uploaded data;
+# read endpoints key their cached responses on it (utils/cache.py)
+class DatasetVersion(db.Model):
+    __tablename__ = "dataset_version"
+    id = db.Column(db.Integer, primary_key=True)
+    version = db.Column(db.Integer, nullable=False, default=0)
+
+
+# ---------------- Summary tables ----------------
+# Pre-aggregated reads, rebuilt inside every upload transaction (utils/summaries.py)
+class DemandBySku(db.Model):
+    __tablename__ = "demand_by_sku"
+    sku = db.Column(db.String(50), primary_key=True)
+    forecast = db.Column(db.BigInteger, nullable=True)   # SUM(demand.forecast)
+    actual = db.Column(db.BigInteger, nullable=True)     # SUM(demand.actual)
+
+
+class DemandBySkuRegion(db.Model):
+    __tablename__ = "demand_by_sku_region"
+    sku = db.Column(db.String(50), primary_key=True)
+    region = db.Column(db.String(50), primary_key=True)
+    forecast = db.Column(db.BigInteger, nullable=True)
+    actual = db.Column(db.BigInteger, nullable=True)
+
+
+class StockBySkuRegion(db.Model):
+    __tablename__ = "stock_by_sku_region"
+    sku = db.Column(db.String(50), primary_key=True)
+    region = db.Column(db.String(50), primary_key=True)
+    stock = db.Column(db.BigInteger, nullable=True)      # SUM(inventory.stock)
+
+
+class Job(db.Model):
+    """Background job (upload ingestion, ...) shared by all API workers."""
+    __tablename__ = "jobs"
+
+    id = db.Column(db.String(32), primary_key=True)
+    kind = db.Column(db.String(50), nullable=False)
+    status = db.Column(db.String(20), nullable=False, default="queued")  # queued / running / done / failed / cancelling / cancelled
+    progress = db.Column(db.JSON, nullable=True)
+    result = db.Column(db.JSON, nullable=True)
+    error = db.Column(db.Text, nullable=True)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
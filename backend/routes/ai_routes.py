@@ -1,8 +1,15 @@
 # backend/routes/ai_routes.py
 from flask import Blueprint, request, jsonify
+import os
 import pandas as pd
-from statsmodels.tsa.arima.model import ARIMA
-from ortools.linear_solver import pywraplp
+from config import Config
+from models import db, DemandForecast
+from utils.allocation import problem_from_frame, problem_from_records, solve_components
+from utils.cache import cached_response
+from utils.fast_forecast import METHODS as FAST_METHODS, fast_forecast
+from utils.forecast_batch import run_batch_forecast
+from utils.forecasting import arima_forecast, auto_arima_forecast, model_cache, selection_cache
+from utils.jobs import JobQueueFull, accepted, submit, wants_async
 
 ai_bp = Blueprint("ai", __name__)
 
@@ -10,14 +17,18 @@ ai_bp = Blueprint("ai", __name__)
 @ai_bp.route("/forecast_adjust", methods=["POST"])
 def forecast_adjust():
     """
-    Adjust forecast using ARIMA (time-series).
+    Adjust forecast using ARIMA (time-series) or a fast method.
     Input:
-      - JSON: { "series": [list], "periods": 4 }
+      - JSON: { "series": [list], "periods": 4, "method": "arima" }
       - OR CSV upload with a column "Demand"
+      - method: arima (default), auto_arima, ses, holt, seasonal_naive, croston
+      - auto_arima also takes "seasonal_period", "budget" (seconds) and "workers" (≤ FORECAST_WORKERS)
     """
     try:
         series = []
         periods = 4
+        method = request.values.get("method", "arima")
+        auto = {"budget": Config.AUTO_ARIMA_BUDGET, "workers": Config.FORECAST_WORKERS}
 
         # ✅ CSV upload mode
         if "file" in request.files:
@@ -32,35 +43,129 @@ def forecast_adjust():
             data = request.json or {}
             series = data.get("series", [])
             periods = int(data.get("periods", 4))
+            method = data.get("method", method)
+            auto = {
+                "seasonal_period": int(data["seasonal_period"]) if data.get("seasonal_period") else None,
+                "budget": float(data.get("budget", Config.AUTO_ARIMA_BUDGET)),
+                "workers": int(data.get("workers", Config.FORECAST_WORKERS)),
+            }
 
         if len(series) < 3:
             return jsonify({"error": "Need at least 3 data points"}), 400
 
-        # Fit ARIMA model
-        model = ARIMA(series, order=(1, 1, 1))
-        model_fit = model.fit()
-        forecast = model_fit.forecast(steps=periods)
+        selection = None
+        if method == "arima":
+            # Fit ARIMA model (reused across calls for the same series, any horizon)
+            forecast = arima_forecast(series, periods)
+        elif method == "auto_arima":
+            # Order chosen by AIC over a parallel, time-budgeted search
+            forecast, selection = auto_arima_forecast(series, periods, **auto)
+        elif method in FAST_METHODS:
+            forecast = fast_forecast([series], periods, method)[0].tolist()
+        else:
+            return jsonify({"error": f"Unknown method '{method}' (use arima, auto_arima or one of {sorted(FAST_METHODS)})"}), 400
 
-        return jsonify({
+        result = {
             "original_series": [round(x, 2) for x in series],
-            "forecast": [round(x, 2) for x in forecast.tolist()]
-        })
+            "forecast": [round(x, 2) for x in forecast]
+        }
+        if selection:
+            result["model"] = selection
+        return jsonify(result)
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+
+@ai_bp.route("/forecast_cache", methods=["GET"])
+def forecast_cache():
+    """Fitted-model cache counters for this worker process, with the auto_arima order selections apart."""
+    return jsonify({**model_cache.stats(), "selections": selection_cache.stats(), "pid": os.getpid()})
+
+
+# ---------------- Batch Forecasts ----------------
+@ai_bp.route("/forecast_batch", methods=["POST"])
+def forecast_batch():
+    """
+    Forecast every SKU × Region series in the demand table in parallel
+    and store the results in demand_forecast.
+    Input:
+      - JSON: { "periods": 4, "workers": 4, "method": "arima" }   (all optional; workers ≤ FORECAST_WORKERS)
+      - method: arima (process pool) or ses / holt / seasonal_naive / croston (vectorized)
+      - ?async=true → run as a background job
+    """
+    try:
+        data = request.get_json(silent=True) or {}
+        periods = int(data.get("periods", request.values.get("periods", 4)))
+        workers = data.get("workers", request.values.get("workers"))
+        workers = int(workers) if workers else None
+        method = data.get("method", request.values.get("method", "arima"))
+        if periods < 1:
+            return jsonify({"error": "periods must be at least 1"}), 400
+        if method != "arima" and method not in FAST_METHODS:
+            return jsonify({"error": f"Unknown method '{method}' (use arima or one of {sorted(FAST_METHODS)})"}), 400
+
+        if wants_async(request):
+            job_id = submit("forecast_batch", run_batch_forecast, periods, workers, method)
+            return jsonify(accepted(job_id)), 202
+
+        return jsonify(run_batch_forecast(periods, workers, method))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+
+@ai_bp.route("/forecasts", methods=["GET"])
+@cached_response
+def forecasts():
+    """Stored batch forecasts, optionally filtered by ?sku= and ?region="""
+    try:
+        query = db.session.query(
+            DemandForecast.sku, DemandForecast.region, DemandForecast.week,
+            DemandForecast.step, DemandForecast.forecast, DemandForecast.method,
+        )
+        if request.args.get("sku"):
+            query = query.filter(DemandForecast.sku == request.args["sku"].strip().upper())
+        if request.args.get("region"):
+            query = query.filter(DemandForecast.region == request.args["region"].strip().title())
+        rows = query.order_by(DemandForecast.sku, DemandForecast.region, DemandForecast.week).all()
+
+        return jsonify([
+            {"SKU": r[0], "Region": r[1], "Week": r[2], "Step": r[3], "Forecast": r[4], "Method": r[5]}
+            for r in rows
+        ])
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
 
 # ---------------- Optimization Engine ----------------
+def _flag(value):
+    return str(value).strip().lower() in ("1", "true", "yes")
+
+
+def _allocation_job(problem, solve_options, progress=None, cancel=None):
+    rows, report = solve_components(problem, progress=progress, cancel=cancel, **solve_options)
+    return {"allocation": rows, "report": report}
+
+
 @ai_bp.route("/optimize_allocation", methods=["POST"])
 def optimize_allocation():
     """
-    Optimize allocation using OR-Tools LP solver.
+    Optimize allocation using OR-Tools (SCIP MIP, or GLOP for the LP relaxation).
     Input:
       - JSON: { "plants": [...], "skus": [...] }
       - OR CSV upload with columns: Plant, SKU, Capacity, Demand, Profit
+      - Solver options (JSON keys or query/form fields):
+        relax (LP relaxation), time_limit (seconds), gap (relative MIP gap), threads,
+        workers (processes for independent components, ≤ ALLOCATION_WORKERS)
+      - Sparse mode: JSON "links": [{"plant", "sku"}], or CSV with sparse=1 (each row is a link).
+        Unlinked plants and SKUs form independent components, solved and cached separately.
+      - ?report=1 → { "allocation": [...], "report": {status, objective, gap, timings, cache, warm_start} }
+      - ?async=true → solve as a background job (202 + status_url). The job's progress carries
+        the objective over the units finished so far; POST /api/jobs/<id>/cancel stops it.
+      - Identical problems are served from the solution cache; edited ones warm-start from the last solution
     """
     try:
-        plants, skus = [], []
-
         # ✅ CSV upload mode
         if "file" in request.files:
             file = request.files["file"]
@@ -70,66 +175,38 @@ def optimize_allocation():
             if not required_cols.issubset(df.columns):
                 return jsonify({"error": f"CSV must contain {required_cols}"}), 400
 
-            # Aggregate unique plants
-            plants = (
-                df.groupby("Plant")["Capacity"].first().reset_index()
-                .rename(columns={"Plant": "name", "Capacity": "capacity"})
-                .to_dict(orient="records")
-            )
-
-            # Aggregate unique SKUs
-            skus = (
-                df.groupby("SKU")[["Demand", "Profit"]].first().reset_index()
-                .rename(columns={"SKU": "sku", "Demand": "demand", "Profit": "profit"})
-                .to_dict(orient="records")
-            )
+            options = request.values
+            problem = problem_from_frame(df, sparse=_flag(options.get("sparse", False)))
         else:
             # ✅ JSON mode
             data = request.json or {}
-            plants = data.get("plants", [])
-            skus = data.get("skus", [])
-
-        solver = pywraplp.Solver.CreateSolver("SCIP")
-        if not solver:
-            return jsonify({"error": "Solver not available"}), 500
-
-        # Variables: allocation[plant][sku]
-        alloc = {}
-        for p in plants:
-            for s in skus:
-                alloc[(p["name"], s["sku"])] = solver.IntVar(
-                    0, solver.infinity(), f"{p['name']}_{s['sku']}"
-                )
-
-        # Constraints: plant capacity
-        for p in plants:
-            solver.Add(sum(alloc[(p["name"], s["sku"])] for s in skus) <= p["capacity"])
-
-        # Constraints: demand fulfillment
-        for s in skus:
-            solver.Add(sum(alloc[(p["name"], s["sku"])] for p in plants) <= s["demand"])
-
-        # Objective: maximize profit
-        solver.Maximize(
-            sum(alloc[(p["name"], s["sku"])] * s["profit"] for p in plants for s in skus)
-        )
+            problem = problem_from_records(data.get("plants", []), data.get("skus", []), data.get("links"))
+            options = {**request.values.to_dict(), **data}
 
-        solver.Solve()
-
-        result = []
-        for p in plants:
-            for s in skus:
-                qty = alloc[(p["name"], s["sku"])].solution_value()
-                if qty > 0:
-                    result.append(
-                        {
-                            "Plant": p["name"],
-                            "SKU": s["sku"],
-                            "Allocated": round(qty, 2)
-                        }
-                    )
+        solve_options = {
+            "relax": _flag(options.get("relax", False)),
+            "time_limit": float(options["time_limit"]) if options.get("time_limit") else None,
+            "gap": float(options["gap"]) if options.get("gap") not in (None, "") else None,
+            "threads": int(options["threads"]) if options.get("threads") else None,
+            "workers": int(options.get("workers") or Config.ALLOCATION_WORKERS),
+        }
 
-        return jsonify(result)
+        if wants_async(request) or _flag(options.get("async", False)):
+            job_id = submit("optimize_allocation", _allocation_job, problem, solve_options,
+                            queue="solver", cancellable=True)
+            return jsonify(accepted(job_id)), 202
+
+        rows, report = solve_components(problem, **solve_options)
+        print(f"✅ Allocation {report['status']} in {report['build_seconds'] + report['solve_seconds']:.3f}s "
+              f"({report['variables']} vars)")
+
+        if _flag(options.get("report", False)):
+            return jsonify({"allocation": rows, "report": report})
+        return jsonify(rows)
+    except JobQueueFull as e:
+        return jsonify({"error": str(e)}), 429
+    except (KeyError, ValueError) as e:
+        return jsonify({"error": f"Invalid allocation input: {e}"}), 400
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
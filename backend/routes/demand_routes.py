@@ -1,54 +1,49 @@
 from flask import Blueprint, request, jsonify
-import pandas as pd
 from models import db, Demand
+from utils.accuracy import ACCURACY_LEVELS, forecast_accuracy
+from utils.cache import cached_response
+from utils.ingest import INGEST_MODES, Field, InvalidValuesError, MissingColumnsError, TableSpec, UnsupportedFormatError, ingest
+from utils.jobs import accepted, submit_ingest, wants_async
 
 demand_bp = Blueprint("demand", __name__)
 
 # ---------------- Upload Demand CSV ----------------
+DEMAND_UPLOAD = TableSpec(Demand, [
+    Field("Week", "week", "int"),
+    Field("Region", "region", "title"),
+    Field("SKU", "sku", "upper"),
+    Field("Forecast_Demand", "forecast", "int"),
+    Field("Actual_Demand", "actual", "int"),
+])
+
+
 @demand_bp.route("/upload_demand", methods=["POST"])
 def upload_demand():
     try:
         if "file" not in request.files:
             return jsonify({"error": "No file uploaded"}), 400
 
-        file = request.files["file"]
-        df = pd.read_csv(file)
-
-        print("📂 Uploaded columns:", list(df.columns))   # Debug
-
-        # 🔹 Normalize col names
-        df.columns = df.columns.str.strip()
-
-        # 🔹 Required cols (match CSV exactly)
-        required_cols = {"Week", "Region", "SKU", "Forecast_Demand", "Actual_Demand"}
-        if not required_cols.issubset(df.columns):
-            return jsonify({"error": f"CSV must contain {required_cols}"}), 400
-
-        # Clear old records
-        db.session.query(Demand).delete()
-        db.session.commit()
+        # "replace" (default) swaps the whole table, "upsert" merges by natural key
+        mode = request.values.get("mode", "replace")
+        if mode not in INGEST_MODES:
+            return jsonify({"error": f"mode must be one of {INGEST_MODES}"}), 400
 
-        # Insert fresh rows
-        inserted = 0
-        for _, row in df.iterrows():
-            demand = Demand(
-                week=int(row["Week"]),
-                region=str(row["Region"]).strip().title(),
-                sku=str(row["SKU"]).strip().upper(),
-                forecast=int(row["Forecast_Demand"]),
-                actual=int(row["Actual_Demand"]),
-            )
-            db.session.add(demand)
-            inserted += 1
+        # ?async=true → return a job id now, ingest in the background
+        if wants_async(request):
+            job_id = submit_ingest(request.files["file"], DEMAND_UPLOAD, mode)
+            return jsonify(accepted(job_id)), 202
 
-        db.session.commit()
-        return jsonify({"message": f"✅ Uploaded {inserted} rows"}), 200
+        report = ingest(request.files["file"], DEMAND_UPLOAD, mode=mode)
+        return jsonify({"message": f"✅ Uploaded {report['rows']} rows", "ingest": report}), 200
+    except (InvalidValuesError, MissingColumnsError, UnsupportedFormatError) as e:
+        return jsonify({"error": str(e)}), 400
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
 
 # ---------------- Get Demand Data ----------------
 @demand_bp.route("/demand", methods=["GET"])
+@cached_response
 def get_demand():
     try:
         demand = (
@@ -78,6 +73,31 @@ def get_demand():
         return jsonify({"error": str(e)}), 500
 
 
+# ---------------- Forecast Accuracy ----------------
+@demand_bp.route("/forecast_accuracy", methods=["GET"])
+@cached_response
+def get_forecast_accuracy():
+    """
+    MAPE, WAPE, bias and tracking signal of the stored forecasts vs actuals
+    (Bias > 0 = over-forecast; Tracking_Signal > 0 = actuals running above).
+    Query: ?level=sku|region|sku_region|total (default sku), ?window=8 weeks
+    for the tracking signal.
+    """
+    try:
+        level = request.args.get("level", "sku")
+        if level not in ACCURACY_LEVELS:
+            return jsonify({"error": f"level must be one of {list(ACCURACY_LEVELS)}"}), 400
+        window = int(request.args.get("window", 8))
+        if window < 1:
+            return jsonify({"error": "window must be at least 1"}), 400
+
+        return jsonify(forecast_accuracy(level, window))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+
 # ---------------- Simulate Demand (Spike) ----------------
 @demand_bp.route("/simulate_demand", methods=["POST"])
 def simulate_demand():
@@ -1,81 +1,74 @@
 from flask import Blueprint, request, jsonify
 import pandas as pd
-from models import db, Demand, Inventory
+from models import db, Demand, Inventory, DemandBySkuRegion, StockBySkuRegion
+from utils.cache import cached_response
+from utils.ingest import INGEST_MODES, Field, InvalidValuesError, MissingColumnsError, TableSpec, UnsupportedFormatError, ingest
+from utils.jobs import accepted, submit_ingest, wants_async
+from utils.rebalancing import lanes_stamp, load_lanes, load_positions, plan_transfers
 import numpy as np
 
 inventory_bp = Blueprint("inventory", __name__)
 
 
 # 🔹 Upload Inventory CSV → Refresh DB dynamically
+INVENTORY_UPLOAD = TableSpec(Inventory, [
+    Field("Week", "week", "int", required=False),
+    Field("SKU", "sku", "upper"),
+    Field("Region", "region", "title"),
+    Field("Stock", "stock", "int"),
+    Field("Forecast", "forecast", "int", required=False),
+])
+
+
 @inventory_bp.route("/upload_inventory", methods=["POST"])
 def upload_inventory():
     """
     Upload a new inventory dataset (CSV) and update DB.
-    Clears old data and inserts new rows dynamically.
-    Supports Forecast column if present.
+    Clears old data and inserts new rows dynamically,
+    or merges by (Week, SKU, Region) with mode=upsert.
+    Supports Week / Forecast columns if present.
     """
     try:
         if "file" not in request.files:
             return jsonify({"error": "No file uploaded"}), 400
 
-        file = request.files["file"]
-        df = pd.read_csv(file)
-
-        # Validate minimum required columns
-        required_cols = {"SKU", "Region", "Stock"}
-        if not required_cols.issubset(df.columns):
-            return jsonify({"error": f"CSV must contain {required_cols}"}), 400
-
-        # Check if Forecast column is included
-        has_forecast = "Forecast" in df.columns
+        # "replace" (default) swaps the whole table, "upsert" merges by natural key
+        mode = request.values.get("mode", "replace")
+        if mode not in INGEST_MODES:
+            return jsonify({"error": f"mode must be one of {INGEST_MODES}"}), 400
 
-        # Clear old records
-        db.session.query(Inventory).delete()
-        db.session.commit()
+        # ?async=true → return a job id now, ingest in the background
+        if wants_async(request):
+            job_id = submit_ingest(request.files["file"], INVENTORY_UPLOAD, mode)
+            return jsonify(accepted(job_id)), 202
 
-        # Insert new data
-        count = 0
-        for _, row in df.iterrows():
-            inv = Inventory(
-                sku=str(row["SKU"]),
-                region=str(row["Region"]),
-                stock=int(row["Stock"]) if not pd.isna(row["Stock"]) else 0,
-                forecast=int(row["Forecast"]) if has_forecast and not pd.isna(row["Forecast"]) else 0
-            )
-            db.session.add(inv)
-            count += 1
-
-        db.session.commit()
+        report = ingest(request.files["file"], INVENTORY_UPLOAD, mode=mode)
 
         return jsonify({
             "message": "✅ Inventory updated dynamically from uploaded CSV",
-            "rows_uploaded": count,
-            "forecast_included": has_forecast
+            "rows_uploaded": report["rows"],
+            "forecast_included": "forecast" in report["columns"],
+            "ingest": report
         })
 
+    except (InvalidValuesError, MissingColumnsError, UnsupportedFormatError) as e:
+        return jsonify({"error": str(e)}), 400
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
 
 # 1️⃣ Stock-Out & Overstock Predictor
 @inventory_bp.route("/inventory_predictor", methods=["GET"])
+@cached_response
 def inventory_predictor():
     try:
         demand = (
-            db.session.query(
-                Demand.sku,
-                Demand.region,
-                db.func.sum(Demand.forecast).label("Forecast")
-            )
-            .group_by(Demand.sku, Demand.region).all()
+            db.session.query(DemandBySkuRegion.sku, DemandBySkuRegion.region, DemandBySkuRegion.forecast)
+            .order_by(DemandBySkuRegion.sku, DemandBySkuRegion.region).all()
         )
         inventory = (
-            db.session.query(
-                Inventory.sku,
-                Inventory.region,
-                db.func.sum(Inventory.stock).label("Stock")
-            )
-            .group_by(Inventory.sku, Inventory.region).all()
+            db.session.query(StockBySkuRegion.sku, StockBySkuRegion.region, StockBySkuRegion.stock)
+            .order_by(StockBySkuRegion.sku, StockBySkuRegion.region).all()
         )
 
         if not demand or not inventory:
@@ -138,73 +131,28 @@ def safety_stock():
 
 # 3️⃣ Automated Rebalancing Suggestions
 @inventory_bp.route("/rebalance", methods=["GET"])
+@cached_response(vary=lanes_stamp)
 def rebalance():
+    """
+    Transfers that move surplus stock to short regions, solved per SKU as a
+    transportation problem (utils/rebalancing.py), so no surplus is promised twice.
+    With REGION_LANES_PATH set, transfers take the cheapest lanes and carry
+    Unit_Cost / Lead_Time; ?max_lead_time= closes slower lanes. Cached
+    responses key on the lane file's mtime too, so edits show up at once.
+    """
     try:
-        demand = db.session.query(
-            Demand.sku, Demand.region,
-            db.func.sum(Demand.forecast).label("Forecast")
-        ).group_by(Demand.sku, Demand.region).all()
-
-        inventory = db.session.query(
-            Inventory.sku, Inventory.region,
-            db.func.sum(Inventory.stock).label("Stock")
-        ).group_by(Inventory.sku, Inventory.region).all()
-
-        if not demand or not inventory:
+        merged = load_positions()
+        if merged is None:
             return jsonify([])
 
-        demand_df = pd.DataFrame(demand, columns=["SKU", "Region", "Forecast"])
-        inv_df = pd.DataFrame(inventory, columns=["SKU", "Region", "Stock"])
-        merged = pd.merge(demand_df, inv_df, on=["SKU", "Region"], how="outer").fillna(0)
-
-        suggestions = []
-
-        for sku, group in merged.groupby("SKU"):
-            shortages = group[group["Stock"] < group["Forecast"]]
-            surpluses = group[group["Stock"] > group["Forecast"] * 1.3]
-
-            # ✅ Case 1: surplus + shortage exist
-            if not shortages.empty and not surpluses.empty:
-                for _, short in shortages.iterrows():
-                    for _, surplus in surpluses.iterrows():
-                        transfer_qty = min(
-                            max(short["Forecast"] - short["Stock"], 0),
-                            max(surplus["Stock"] - surplus["Forecast"], 0)
-                        )
-                        if transfer_qty > 0:
-                            suggestions.append({
-                                "SKU": sku,
-                                "From": surplus["Region"],
-                                "To": short["Region"],
-                                "Quantity": int(transfer_qty)
-                            })
-
-            # ⚡ Case 2: only shortages → take from region with max stock
-            elif not shortages.empty:
-                donor = group.loc[group["Stock"].idxmax()]
-                for _, short in shortages.iterrows():
-                    transfer_qty = max(short["Forecast"] - short["Stock"], 0)
-                    if transfer_qty > 0 and donor["Region"] != short["Region"]:
-                        suggestions.append({
-                            "SKU": sku,
-                            "From": donor["Region"],
-                            "To": short["Region"],
-                            "Quantity": int(min(transfer_qty, donor["Stock"]))
-                        })
-
-            # ⚡ Case 3: only surpluses → send to region with min stock
-            elif not surpluses.empty:
-                receiver = group.loc[group["Stock"].idxmin()]
-                for _, surplus in surpluses.iterrows():
-                    transfer_qty = max(surplus["Stock"] - surplus["Forecast"], 0)
-                    if transfer_qty > 0 and receiver["Region"] != surplus["Region"]:
-                        suggestions.append({
-                            "SKU": sku,
-                            "From": surplus["Region"],
-                            "To": receiver["Region"],
-                            "Quantity": int(transfer_qty)
-                        })
+        max_lead_time = request.args.get("max_lead_time")
+        moves = plan_transfers(merged, load_lanes(),
+                               float(max_lead_time) if max_lead_time else None)
 
+        # NaN (no lane data for a move) → null
+        suggestions = moves.astype(object).where(moves.notna(), None).to_dict(orient="records")
         return jsonify(suggestions if suggestions else [{"SKU": "N/A", "From": "-", "To": "-", "Quantity": 0}])
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
     except Exception as e:
         return jsonify({"error": str(e)}), 500
@@ -0,0 +1,36 @@
+# backend/routes/job_routes.py
+from flask import Blueprint, jsonify
+from utils.jobs import cancel_job, get_job
+
+job_bp = Blueprint("jobs", __name__)
+
+
+# 🔹 Background job status (uploads run with ?async=true)
+@job_bp.route("/jobs/<job_id>", methods=["GET"])
+def job_status(job_id):
+    """
+    Returns status, progress (rows processed, rows/sec), errors and,
+    once done, the final counts of a background job.
+    """
+    try:
+        job = get_job(job_id)
+        if job is None:
+            return jsonify({"error": "Job not found"}), 404
+        return jsonify(job)
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+
+@job_bp.route("/jobs/<job_id>/cancel", methods=["POST"])
+def job_cancel(job_id):
+    """
+    Cancel a background job. Queued jobs stop at once; running solver jobs
+    stop at their next check and keep the partial result.
+    """
+    try:
+        job = cancel_job(job_id)
+        if job is None:
+            return jsonify({"error": "Job not found"}), 404
+        return jsonify(job)
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
@@ -1,69 +1,79 @@
 # backend/routes/optimization_routes.py
 from flask import Blueprint, request, jsonify
-import pandas as pd
-from models import db, Demand, Supplier
+from utils.network_planner import NETWORK_SOLVER, plan_network
+from utils.sourcing import load_sourcing_data, solve_sourcing
 
 optimization_bp = Blueprint("optimization", __name__)
 
+
+def _flag(value):
+    return str(value).strip().lower() in ("1", "true", "yes")
+
+
 @optimization_bp.route("/optimize_production", methods=["POST"])
 def optimize_production():
     """
-    Allocates production across SKUs based on demand and supplier constraints.
+    Allocates production across SKUs based on demand and supplier constraints,
+    as a least-cost sourcing MIP (min_order_qty, max_capacity, unit_cost and
+    the total capacity). No SKU is allocated above its forecast.
+    Body (all optional):
+      { "capacity": 1000, "relax": false, "time_limit": 10, "gap": 0.005, "report": false }
+      - time_limit / gap default to SOURCING_TIME_LIMIT / SOURCING_GAP; past the time limit
+        the best plan found so far is returned (status FEASIBLE)
+      - report → { "allocation": [...], "report": {status, total_cost, shortfall, gap, timings} }
     """
     try:
-        req = request.get_json()
-        total_capacity = req.get("capacity", 1000)
-
-        # Demand aggregated by SKU
-        demand = (
-            db.session.query(Demand.sku, db.func.sum(Demand.forecast).label("Total_Forecast"))
-            .group_by(Demand.sku).all()
-        )
-        demand_df = pd.DataFrame(demand, columns=["SKU", "Total_Forecast"])
+        req = request.get_json(silent=True) or {}
+        total_capacity = float(req.get("capacity", 1000))
 
-        suppliers = db.session.query(Supplier).all()
-        if demand_df.empty or not suppliers:
+        demand, links = load_sourcing_data()
+        if demand.empty or links.empty:
             return jsonify([])
 
-        results = []
-        used_capacity = 0
-
-        for _, row in demand_df.iterrows():
-            sku = row["SKU"]
-            forecast = row["Total_Forecast"]
-
-            # Get suppliers linked to this SKU
-            sku_suppliers = [s for s in suppliers if s.sku_linked == sku]
-            if not sku_suppliers:
-                continue
-
-            for s in sku_suppliers:
-                # Allocate respecting supplier constraints
-                alloc = min(
-                    forecast - used_capacity,
-                    s.max_capacity,
-                    total_capacity - used_capacity
-                )
-                alloc = max(s.min_order_qty, alloc)
-
-                if alloc <= 0:
-                    continue
+        results, report = solve_sourcing(
+            demand, links, total_capacity,
+            relax=_flag(req.get("relax", False)),
+            time_limit=float(req["time_limit"]) if req.get("time_limit") else None,
+            gap=float(req["gap"]) if req.get("gap") is not None else None,
+        )
+        print(f"✅ Sourcing {report['status']} for {report['links']} supplier links "
+              f"in {report['build_seconds'] + report['solve_seconds']:.3f}s")
 
-                used_capacity += alloc
+        if _flag(req.get("report", False)):
+            return jsonify({"allocation": results, "report": report})
+        return jsonify(results)
+    except (TypeError, ValueError) as e:
+        return jsonify({"error": f"Invalid optimization input: {e}"}), 400
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
 
-                results.append({
-                    "SKU": sku,
-                    "Forecast": forecast,
-                    "Allocated": alloc,
-                    "Supplier_ID": s.supplier_id,
-                    "Supplier_Name": s.name,
-                    "Unit_Cost": s.unit_cost,
-                    "Total_Cost": round(alloc * s.unit_cost, 2)
-                })
 
-                if used_capacity >= total_capacity:
-                    break
+@optimization_bp.route("/network_plan", methods=["POST"])
+def network_plan():
+    """
+    Least-cost flows through the supplier → plant → region network, built from
+    the suppliers, production, demand and inventory tables (utils/network_planner.py).
+    Body (all optional):
+      { "week": 12, "max_lead_time_days": 14, "solver": "highs", "time_limit": 30, "report": false }
+      - week defaults to the latest production week; regions need its forecast less stock on hand
+      - lane freight costs come from REGION_LANES_PATH (From/To may name suppliers, plants or regions)
+      - report → { "flows": [...], "shortfall": [...], "report": {status, total_cost, nodes, arcs, timings} }
+    """
+    try:
+        req = request.get_json(silent=True) or {}
+        flows, shortfall, report = plan_network(
+            week=int(req["week"]) if req.get("week") not in (None, "") else None,
+            max_lead_time_days=float(req["max_lead_time_days"]) if req.get("max_lead_time_days") is not None else None,
+            solver_name=req.get("solver", NETWORK_SOLVER),
+            time_limit=float(req["time_limit"]) if req.get("time_limit") else None,
+        )
+        print(f"✅ Network plan {report['status']} over {report['nodes']} nodes / {report['arcs']} arcs "
+              f"in {report['build_seconds'] + report['solve_seconds']:.3f}s")
 
-        return jsonify(results)
+        if req.get("report"):
+            return jsonify({"flows": flows, "shortfall": shortfall, "report": report})
+        return jsonify(flows)
+    except (TypeError, ValueError) as e:
+        return jsonify({"error": f"Invalid network plan input: {e}"}), 400
     except Exception as e:
         return jsonify({"error": str(e)}), 500
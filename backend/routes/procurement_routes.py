@@ -1,11 +1,29 @@
 from flask import Blueprint, request, jsonify
 import pandas as pd
-from models import db, Demand, Supplier
+from models import db, Demand, DemandBySku, Supplier
+from utils.ingest import INGEST_MODES, Field, InvalidValuesError, MissingColumnsError, TableSpec, UnsupportedFormatError, ingest
+from utils.jobs import accepted, submit_ingest, wants_async
+from utils.cache import bump_version, cached_response
+from utils.summaries import refresh_summaries
 
 procurement_bp = Blueprint("procurement", __name__)
 
 
 # ---------------- Upload Procurement CSV ----------------
+PROCUREMENT_UPLOAD = TableSpec(
+    Demand,
+    [
+        Field("SKU", "sku", "upper"),
+        Field("Forecast_Demand", "forecast", "int"),
+    ],
+    constants={
+        "region": "GLOBAL",  # default (since not needed now)
+        "week": 0,           # dummy placeholder
+        "actual": 0,         # not used now
+    },
+)
+
+
 @procurement_bp.route("/upload_procurement", methods=["POST"])
 def upload_procurement():
     """Upload single procurement CSV with SKU and Forecast_Demand"""
@@ -13,30 +31,20 @@ def upload_procurement():
         if "file" not in request.files:
             return jsonify({"error": "No file uploaded"}), 400
 
-        file = request.files["file"]
-        df = pd.read_csv(file)
+        # "replace" (default) swaps the whole table, "upsert" merges by natural key
+        mode = request.values.get("mode", "replace")
+        if mode not in INGEST_MODES:
+            return jsonify({"error": f"mode must be one of {INGEST_MODES}"}), 400
 
-        required_cols = {"SKU", "Forecast_Demand"}
-        if not required_cols.issubset(df.columns):
-            return jsonify({"error": f"CSV must contain {required_cols}"}), 400
+        # ?async=true → return a job id now, ingest in the background
+        if wants_async(request):
+            job_id = submit_ingest(request.files["file"], PROCUREMENT_UPLOAD, mode)
+            return jsonify(accepted(job_id)), 202
 
-        # Clear old demand records
-        db.session.query(Demand).delete()
-        db.session.commit()
-
-        # Insert fresh demand data
-        for _, row in df.iterrows():
-            demand = Demand(
-                sku=str(row["SKU"]).strip().upper(),
-                region="GLOBAL",  # default (since not needed now)
-                week=0,           # dummy placeholder
-                forecast=int(row["Forecast_Demand"]),
-                actual=0          # not used now
-            )
-            db.session.add(demand)
-
-        db.session.commit()
-        return jsonify({"message": "✅ Procurement data uploaded successfully"})
+        report = ingest(request.files["file"], PROCUREMENT_UPLOAD, mode=mode)
+        return jsonify({"message": "✅ Procurement data uploaded successfully", "ingest": report})
+    except (InvalidValuesError, MissingColumnsError, UnsupportedFormatError) as e:
+        return jsonify({"error": str(e)}), 400
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
@@ -48,6 +56,8 @@ def reset_procurement():
     try:
         db.session.query(Demand).delete()
         db.session.query(Supplier).delete()
+        refresh_summaries(["demand"])
+        bump_version()
         db.session.commit()
         return jsonify({"message": "✅ Procurement data reset successfully"})
     except Exception as e:
@@ -57,15 +67,13 @@ def reset_procurement():
 # ---------------- Procurement Planning ----------------
 # ---------------- Procurement Planning ----------------
 @procurement_bp.route("/procurement_plan", methods=["GET"])
+@cached_response
 def procurement_plan():
     """Return only SKU and Forecast Demand"""
     try:
         demand = (
-            db.session.query(
-                Demand.sku,
-                db.func.sum(Demand.forecast).label("Total_Forecast")
-            )
-            .group_by(Demand.sku)
+            db.session.query(DemandBySku.sku, DemandBySku.forecast)
+            .order_by(DemandBySku.sku)
             .all()
         )
         demand_df = pd.DataFrame(demand, columns=["SKU", "Total_Forecast"])
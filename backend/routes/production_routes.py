@@ -1,4 +1,5 @@
 from flask import Blueprint, request, jsonify
+from utils.multi_period import plan_horizon
 from utils.optimization_engine import generate_production_plan
 
 production_bp = Blueprint("production", __name__)
@@ -20,18 +21,43 @@ def production_plan():
               "Profit_Margin": 1.2
             },
             ...
-        ]
+        ],
+        "week": 12   # optional; without uploaded_data the plan is built from the
+                     # production & demand tables for this week (default: latest)
       }
+    Multi-week mode ("mode": "multi_period", from the tables; utils/multi_period.py):
+      { "mode": "multi_period", "start_week": 1, "horizon": 52,
+        "holding_cost": 0.1, "backlog_cost": 1.0, "time_limit": 30 }   # all optional
+      → { "plan": [{Week, Plant, SKU, Produce}],
+          "positions": [{Week, SKU, Demand, Produced, Inventory, Backlog}], "report": {...} }
+      Production per plant × SKU × week with inventory carried between weeks, solved as one
+      min-cost flow (whole-unit data) or LP.
     """
     try:
         data = request.json or {}
         strategy = data.get("strategy", "demand-priority")
 
+        if data.get("mode") == "multi_period":
+            plan, positions, report = plan_horizon(
+                start_week=int(data["start_week"]) if data.get("start_week") not in (None, "") else None,
+                horizon=int(data["horizon"]) if data.get("horizon") not in (None, "") else None,
+                holding_cost=data.get("holding_cost"),
+                backlog_cost=data.get("backlog_cost"),
+                time_limit=float(data["time_limit"]) if data.get("time_limit") else None,
+            )
+            print(f"✅ {report['weeks']}-week plan {report['status']} ({report['variables']} vars) "
+                  f"in {report['build_seconds'] + report['solve_seconds']:.3f}s")
+            return jsonify({"plan": plan, "positions": positions, "report": report})
+
         # ✅ Handle uploaded CSV dataset if present
         uploaded_data = data.get("uploaded_data")
 
-        plan = generate_production_plan(strategy, uploaded_data=uploaded_data)
+        week = int(data["week"]) if data.get("week") not in (None, "") else None
+
+        plan = generate_production_plan(strategy, uploaded_data=uploaded_data, week=week)
 
         return jsonify(plan)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
     except Exception as e:
         return jsonify({"error": str(e)}), 500
@@ -1,5 +1,6 @@
 from flask import Blueprint, jsonify
 from models import db  # ✅ your SQLAlchemy instance
+from utils.cache import bump_version, dataset_version
 import os
 
 reset_bp = Blueprint("reset", __name__)
@@ -11,9 +12,13 @@ def reset():
     Drops all tables, recreates schema, clears uploads.
     """
     try:
-        # ✅ Drop & recreate tables
+        # ✅ Drop & recreate tables, carrying the dataset version over so cached reads expire
+        version = dataset_version()
+        db.session.commit()
         db.drop_all()
         db.create_all()
+        bump_version(version)
+        db.session.commit()
 
         # ✅ (Optional) Clear uploaded CSV files
         upload_folder = os.path.join(os.getcwd(), "backend", "data", "uploads")
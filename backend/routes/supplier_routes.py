@@ -1,62 +1,66 @@
 # backend/routes/supplier_routes.py
 from flask import Blueprint, request, jsonify
-import pandas as pd
 from models import db, Supplier
+from utils.cache import cached_response
+from utils.ingest import INGEST_MODES, Field, InvalidValuesError, MissingColumnsError, TableSpec, UnsupportedFormatError, ingest
+from utils.jobs import accepted, submit_ingest, wants_async
 
 supplier_bp = Blueprint("supplier", __name__)
 
 
 # 🔹 Upload Supplier CSV → Refresh DB dynamically
+SUPPLIER_UPLOAD = TableSpec(Supplier, [
+    Field("Supplier_ID", "supplier_id", "str"),
+    Field("Name", "name", "str"),
+    Field("Committed_Lead_Time", "committed_lead_time", "int"),
+    Field("Avg_Lead_Time_Days", "avg_lead_time", "int"),
+    Field("Deliveries", "deliveries", "int"),
+    Field("On_Time_Deliveries", "on_time_deliveries", "int"),
+    # Optional procurement planning fields
+    Field("Material", "material", "str", required=False),
+    Field("SKU_Linked", "sku_linked", "upper", required=False),
+    Field("Unit_Cost", "unit_cost", "float", required=False),
+    Field("Min_Order_Qty", "min_order_qty", "int", required=False),
+    Field("Max_Capacity", "max_capacity", "int", required=False),
+    Field("Lead_Time_Days", "lead_time_days", "int", required=False),
+    Field("Current_Inventory", "current_inventory", "int", required=False),
+    Field("Reorder_Point", "reorder_point", "int", required=False),
+])
+
+
 @supplier_bp.route("/upload_suppliers", methods=["POST"])
 def upload_suppliers():
     """
     Upload new supplier dataset (CSV) and update DB dynamically.
-    Clears old supplier records and inserts new ones.
+    Clears old supplier records and inserts new ones, or with mode=upsert
+    replaces only the rows of the uploaded Supplier_IDs.
     """
     try:
         if "file" not in request.files:
             return jsonify({"error": "No file uploaded"}), 400
 
-        file = request.files["file"]
-        df = pd.read_csv(file)
-
-        # ✅ Required columns for Supplier upload
-        required_cols = {
-            "Supplier_ID",
-            "Name",
-            "Committed_Lead_Time",
-            "Avg_Lead_Time_Days",
-            "Deliveries",
-            "On_Time_Deliveries",
-        }
-        if not required_cols.issubset(df.columns):
-            return jsonify({"error": f"CSV must contain {required_cols}"}), 400
+        # "replace" (default) swaps the whole table, "upsert" merges by natural key
+        mode = request.values.get("mode", "replace")
+        if mode not in INGEST_MODES:
+            return jsonify({"error": f"mode must be one of {INGEST_MODES}"}), 400
 
-        # Clear old supplier records
-        db.session.query(Supplier).delete()
-        db.session.commit()
-
-        # Insert fresh supplier data
-        for _, row in df.iterrows():
-            supplier = Supplier(
-                supplier_id=str(row["Supplier_ID"]),
-                name=str(row["Name"]),
-                committed_lead_time=int(row["Committed_Lead_Time"]),
-                avg_lead_time=int(row["Avg_Lead_Time_Days"]),
-                deliveries=int(row["Deliveries"]),
-                on_time_deliveries=int(row["On_Time_Deliveries"]),
-            )
-            db.session.add(supplier)
+        # ?async=true → return a job id now, ingest in the background
+        if wants_async(request):
+            job_id = submit_ingest(request.files["file"], SUPPLIER_UPLOAD, mode)
+            return jsonify(accepted(job_id)), 202
 
-        db.session.commit()
+        report = ingest(request.files["file"], SUPPLIER_UPLOAD, mode=mode)
 
-        return jsonify({"message": "✅ Supplier data updated successfully"})
+        return jsonify({"message": "✅ Supplier data updated successfully", "ingest": report})
+    except (InvalidValuesError, MissingColumnsError, UnsupportedFormatError) as e:
+        return jsonify({"error": str(e)}), 400
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
 
 # 🔹 Supplier Reliability Tracker
 @supplier_bp.route("/suppliers", methods=["GET"])
+@cached_response
 def get_suppliers():
     """
     Returns suppliers with reliability % and delay flags
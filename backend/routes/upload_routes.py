@@ -1,6 +1,8 @@
 from flask import Blueprint, request, jsonify
 import os
-from utils.data_loader import load_csv_to_db
+from utils.data_loader import load_files_to_db
+from utils.ingest import InvalidValuesError, UnsupportedFormatError, detect_format
+from utils.jobs import accepted, submit, wants_async
 
 upload_bp = Blueprint("upload", __name__)
 UPLOAD_FOLDER = "backend/data/uploads"
@@ -12,15 +14,27 @@ def upload_files():
         return jsonify({"error": "No file part"}), 400
 
     uploaded_files = request.files.getlist("files")
-    saved_files = []
+    saved_files, saved_paths, formats = [], [], []
 
     for file in uploaded_files:
-        if file.filename.endswith(".csv"):
+        # CSV, Parquet or Arrow IPC, by extension or content type
+        fmt = detect_format(file.filename, file.mimetype)
+        if fmt:
             filepath = os.path.join(UPLOAD_FOLDER, file.filename)
             file.save(filepath)
             saved_files.append(file.filename)
+            saved_paths.append(filepath)
+            formats.append(fmt)
 
-            # ✅ Parse and insert into DB
-            load_csv_to_db(filepath)
-    
-    return jsonify({"message": "Files uploaded successfully", "files": saved_files})
+    # ?async=true → return a job id now, load in the background
+    if wants_async(request) and saved_paths:
+        job_id = submit("load_files", load_files_to_db, saved_paths, formats)
+        return jsonify({**accepted(job_id), "files": saved_files}), 202
+
+    # ✅ Parse all files in parallel, insert into DB in one commit
+    try:
+        loaded = load_files_to_db(saved_paths, formats) if saved_paths else {}
+    except (InvalidValuesError, UnsupportedFormatError) as e:
+        return jsonify({"error": str(e)}), 400
+
+    return jsonify({"message": "Files uploaded successfully", "files": saved_files, "loaded": loaded})
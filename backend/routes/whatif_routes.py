@@ -1,7 +1,7 @@
 # backend/routes/whatif_routes.py
 from flask import Blueprint, request, jsonify
 import pandas as pd
-from models import db, Demand, Inventory
+from models import db, DemandBySku, StockBySkuRegion
 
 whatif_bp = Blueprint("whatif", __name__)
 
@@ -14,11 +14,11 @@ def whatif_analysis():
 
         # Demand vs Stock baseline
         demand = db.session.query(
-            Demand.sku, db.func.sum(Demand.forecast).label("Forecast")
-        ).group_by(Demand.sku).all()
+            DemandBySku.sku, DemandBySku.forecast
+        ).order_by(DemandBySku.sku).all()
         inventory = db.session.query(
-            Inventory.sku, db.func.sum(Inventory.stock).label("Stock")
-        ).group_by(Inventory.sku).all()
+            StockBySkuRegion.sku, db.func.sum(StockBySkuRegion.stock).label("Stock")
+        ).group_by(StockBySkuRegion.sku).all()
 
         demand_df = pd.DataFrame(demand, columns=["SKU", "Forecast"])
         inv_df = pd.DataFrame(inventory, columns=["SKU", "Stock"])
@@ -0,0 +1,86 @@
+# utils/accuracy.py
+import numpy as np
+import pandas as pd
+from models import db, Demand
+
+# level → demand columns it groups by ("total" is one series over all rows)
+ACCURACY_LEVELS = {
+    "sku": ["sku"],
+    "region": ["region"],
+    "sku_region": ["sku", "region"],
+    "total": [],
+}
+TRACKING_LIMIT = 4   # |tracking signal| beyond this flags a biased forecast
+
+
+def weekly_totals(keys):
+    """Forecast and actual per week for each group of `keys`, summed in SQL."""
+    columns = [getattr(Demand, k) for k in keys]
+    rows = (
+        db.session.query(*columns, Demand.week, db.func.sum(Demand.forecast), db.func.sum(Demand.actual))
+        .filter(Demand.week.isnot(None))
+        .group_by(*columns, Demand.week)
+        .all()
+    )
+    return pd.DataFrame(rows, columns=[*keys, "week", "forecast", "actual"]).fillna({"forecast": 0, "actual": 0})
+
+
+def accuracy_table(weekly, keys, window=8):
+    """
+    MAPE, WAPE, bias and tracking signal per group of a weekly
+    forecast/actual frame, with grouped array operations only.
+    The tracking signal is over the last `window` weeks of each group.
+    """
+    if weekly.empty:
+        return pd.DataFrame(columns=[*keys, "weeks", "forecast", "actual", "mape", "wape", "bias",
+                                     "tracking_signal", "flag"])
+    df = weekly.sort_values([*keys, "week"]).reset_index(drop=True)
+    df["group"] = df.groupby(keys, sort=False).ngroup() if keys else 0
+    df["error"] = df["forecast"] - df["actual"]            # + means over-forecast
+    df["abs_error"] = df["error"].abs()
+    df["ape"] = np.where(df["actual"] > 0, df["abs_error"] / df["actual"].where(df["actual"] > 0), np.nan)
+
+    # Trailing `window` weeks of each group feed the tracking signal
+    position = df.groupby("group").cumcount()
+    recent = position >= df.groupby("group")["week"].transform("size") - window
+    tracked = df[recent]
+    per_group = df.groupby("group")
+    tracked_group = tracked.groupby("group")
+
+    result = pd.DataFrame({
+        "weeks": per_group.size(),
+        "forecast": per_group["forecast"].sum(),
+        "actual": per_group["actual"].sum(),
+        "mape": per_group["ape"].mean() * 100,
+        "abs_error": per_group["abs_error"].sum(),
+        "error": per_group["error"].sum(),
+        # Cumulative (actual - forecast) over mean absolute deviation, last `window` weeks
+        "ts_sum": -tracked_group["error"].sum(),
+        "ts_mad": tracked_group["abs_error"].mean(),
+    })
+    actual = result["actual"].where(result["actual"] > 0)
+    result["wape"] = result["abs_error"] / actual * 100
+    result["bias"] = result["error"] / actual * 100
+    result["tracking_signal"] = result["ts_sum"] / result["ts_mad"].where(result["ts_mad"] > 0)
+    result["flag"] = np.where(
+        result["tracking_signal"].abs() > TRACKING_LIMIT,
+        np.where(result["tracking_signal"] > 0, "under-forecast", "over-forecast"),
+        "ok",
+    )
+
+    labels = df.drop_duplicates("group").set_index("group")[keys]
+    result = labels.join(result) if keys else result
+    return result.reset_index(drop=True)[[*keys, "weeks", "forecast", "actual", "mape", "wape", "bias",
+                                          "tracking_signal", "flag"]]
+
+
+def forecast_accuracy(level="sku", window=8):
+    """Accuracy rows for `level` (see ACCURACY_LEVELS), JSON-ready."""
+    keys = ACCURACY_LEVELS[level]
+    table = accuracy_table(weekly_totals(keys), keys, window)
+    table = table.round({"mape": 2, "wape": 2, "bias": 2, "tracking_signal": 2})
+    table = table.astype({"forecast": "int64", "actual": "int64", "weeks": "int64"})
+    return table.rename(columns={
+        "sku": "SKU", "region": "Region", "weeks": "Weeks", "forecast": "Forecast", "actual": "Actual",
+        "mape": "MAPE", "wape": "WAPE", "bias": "Bias", "tracking_signal": "Tracking_Signal", "flag": "Flag",
+    }).replace({np.nan: None}).to_dict(orient="records")
@@ -0,0 +1,586 @@
+# utils/allocation.py
+import hashlib
+import json
+import sqlite3
+import time
+from collections import namedtuple
+from concurrent.futures import FIRST_COMPLETED, wait
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import nullcontext
+
+import numpy as np
+import scipy.sparse as sp
+from ortools.linear_solver.python import model_builder_helper as mbh
+from scipy.sparse.csgraph import connected_components
+
+from config import Config
+from utils.cache import shared_store
+from utils.workers import cancel_flag, discard_pool, flag_token, split_batches, worker_pool
+
+# One allocation problem as flat arrays: plant i has capacity[i], sku j has
+# demand[j] and profit[j] per unit. `links`, when given, is a (k, 2) array
+# of (plant index, sku index) pairs that may be allocated; None means every
+# plant can make every SKU.
+AllocationProblem = namedtuple(
+    "AllocationProblem", ["plants", "capacity", "skus", "demand", "profit", "links"], defaults=(None,)
+)
+
+MIP_SOLVER = "scip"
+LP_SOLVER = "glop"
+UNIT_VARIABLES = 2000   # small components are packed into solve units up to this many variables
+PROGRESS_SECONDS = 0.5  # least time between progress reports of a decomposed solve
+FIRST_SLICE_SECONDS = 1.0   # a MIP solved with progress runs in time slices of 1, 2, 4, ... seconds
+
+
+def _links_array(pairs):
+    return np.array(pairs, dtype=np.int64).reshape(-1, 2)
+
+
+def problem_from_records(plants, skus, links=None):
+    """
+    Build a problem from the JSON shape: plants [{name, capacity}], skus
+    [{sku, demand, profit}] and optionally links [{plant, sku}].
+    """
+    plant_names = [p["name"] for p in plants]
+    sku_names = [s["sku"] for s in skus]
+    if links is not None:
+        plant_pos = {name: i for i, name in enumerate(plant_names)}
+        sku_pos = {name: j for j, name in enumerate(sku_names)}
+        links = _links_array(sorted({(plant_pos[l["plant"]], sku_pos[l["sku"]]) for l in links}))
+    return AllocationProblem(
+        plants=plant_names,
+        capacity=np.array([p["capacity"] for p in plants], dtype=np.float64),
+        skus=sku_names,
+        demand=np.array([s["demand"] for s in skus], dtype=np.float64),
+        profit=np.array([s["profit"] for s in skus], dtype=np.float64),
+        links=links,
+    )
+
+
+def problem_from_frame(df, sparse=False):
+    """
+    Build a problem from CSV rows with Plant, SKU, Capacity, Demand, Profit
+    (first value wins). With `sparse`, each row's Plant/SKU pair is a link
+    and unlisted pairs cannot be allocated.
+    """
+    plants = df.groupby("Plant")["Capacity"].first()
+    skus = df.groupby("SKU")[["Demand", "Profit"]].first()
+    links = None
+    if sparse:
+        pairs = df[["Plant", "SKU"]].drop_duplicates()
+        links = _links_array(np.column_stack([
+            plants.index.get_indexer(pairs["Plant"]), skus.index.get_indexer(pairs["SKU"]),
+        ]))
+        links = links[np.lexsort((links[:, 1], links[:, 0]))]
+    return AllocationProblem(
+        plants=plants.index.tolist(),
+        capacity=plants.to_numpy(dtype=np.float64),
+        skus=skus.index.tolist(),
+        demand=skus["Demand"].to_numpy(dtype=np.float64),
+        profit=skus["Profit"].to_numpy(dtype=np.float64),
+        links=links,
+    )
+
+
+# ---------------- Model ----------------
+def build_model(problem, relax=False):
+    """
+    Bulk-build the MIP/LP from arrays in one call.
+
+    Without links any plant can make any SKU at the same profit, so plant
+    capacities pool into one row: maximize Σ profit·x subject to
+    Σ x ≤ Σ capacity and 0 ≤ x ≤ demand, one variable per SKU. Splitting the
+    pooled optimum back over plants (split_over_plants) is exact.
+
+    With links there is one variable per link, one capacity row per plant
+    and one demand row per SKU.
+    """
+    if problem.links is None:
+        n = len(problem.skus)
+        upper = np.maximum(problem.demand, 0)
+        objective = problem.profit
+        row_upper = np.array([max(problem.capacity.sum(), 0.0)])   # Σ x ≤ total capacity
+        matrix = sp.csr_matrix(np.ones((1, n)))
+    else:
+        plant_of, sku_of = problem.links[:, 0], problem.links[:, 1]
+        n, n_plants = len(problem.links), len(problem.plants)
+        upper = np.maximum(np.minimum(problem.demand[sku_of], problem.capacity[plant_of]), 0)
+        objective = problem.profit[sku_of]
+        row_upper = np.maximum(np.concatenate([problem.capacity, problem.demand]), 0)
+        matrix = sp.csr_matrix(
+            (np.ones(2 * n), (np.concatenate([plant_of, n_plants + sku_of]), np.tile(np.arange(n), 2))),
+            shape=(n_plants + len(problem.skus), n),
+        )
+
+    model = mbh.ModelBuilderHelper()
+    model.fill_model_from_sparse_data(
+        np.zeros(n),                          # variable lower bounds
+        upper,                                # variable upper bounds
+        objective,
+        np.full(len(row_upper), -np.inf),     # constraint lower bounds
+        row_upper,
+        matrix,
+    )
+    model.set_maximize(True)
+    if not relax:
+        for index in range(n):
+            model.set_var_integrality(index, True)
+    return model
+
+
+def variable_labels(problem):
+    """Name of each model variable: the SKU (pooled) or "plant|sku" (linked)."""
+    if problem.links is None:
+        return list(problem.skus)
+    return [f"{problem.plants[p]}|{problem.skus[s]}" for p, s in problem.links]
+
+
+def solver_parameters(solver_name, gap=None, threads=None):
+    """Solver-specific parameter string for the MIP gap and thread count."""
+    if solver_name == "sat":
+        params = [f"relative_gap_limit:{gap}"] if gap is not None else []
+        params.append(f"num_workers:{int(threads or 1)}")
+        return ",".join(params)
+    if solver_name != MIP_SOLVER:
+        return ""   # GLOP: no gap; single-threaded
+    params = []
+    if gap is not None:
+        params.append(f"limits/gap = {gap}")
+    if threads:
+        params.append(f"parallel/maxnthreads = {int(threads)}")
+    return "\n".join(params)
+
+
+def split_over_plants(problem, quantities):
+    """
+    Fill plants in order with the pooled SKU quantities. Quantities and
+    capacities are laid end to end; every overlap of a SKU's interval with
+    a plant's interval becomes one (plant, sku, quantity) row.
+    """
+    if not len(quantities):
+        return np.array([], dtype=int), np.array([], dtype=int), np.array([])
+    sku_end = np.cumsum(quantities)
+    plant_end = np.cumsum(np.maximum(problem.capacity, 0))
+    cuts = np.unique(np.concatenate([[0.0], sku_end, plant_end]))
+    cuts = cuts[cuts <= sku_end[-1]]
+    lengths = np.diff(cuts)
+    mids = cuts[:-1] + lengths / 2
+    sku_index = np.searchsorted(sku_end, mids, side="right")
+    plant_index = np.searchsorted(plant_end, mids, side="right")
+    keep = (lengths > 1e-9) & (plant_index < len(problem.plants))
+    return plant_index[keep], sku_index[keep], lengths[keep]
+
+
+def _hint(model, values):
+    # Clip to the variable bounds; the solver repairs what is left
+    for index, value in enumerate(values):
+        model.add_hint(index, float(min(max(value, 0.0), model.var_upper_bound(index))))
+
+
+def _run(model, solver_name, time_limit, gap, threads, cancel):
+    solver = mbh.ModelSolverHelper(solver_name)
+    if time_limit:
+        solver.set_time_limit_in_seconds(float(time_limit))
+    params = solver_parameters(solver_name, gap, threads)
+    if params:
+        solver.set_solver_specific_parameters(params)
+    with cancel.hook(solver.interrupt_solve) if cancel is not None else nullcontext():
+        solver.solve(model)
+    return solver
+
+
+def solve_allocation(problem, relax=False, time_limit=None, gap=None, threads=None, hint=None, cancel=None,
+                     progress=None):
+    """
+    Solve one allocation problem. Returns (rows, report) where rows are
+    {Plant, SKU, Allocated} for every positive allocation. `hint`, a value
+    per model variable from an earlier solve, seeds the MIP as a warm start.
+    A cancel on `cancel` (a workers.CancelToken) stops the solve early.
+
+    With `progress` or `cancel`, a MIP runs in doubling time slices, each
+    warm-started from the last incumbent: SCIP ignores interrupts, so a
+    cancel is seen between slices, and `progress(dict)` gets the incumbent
+    objective and bound after every slice that ends without a proof. Each
+    slice restarts the search, so this costs solve time; jobs use it,
+    synchronous requests don't.
+    """
+    started = time.perf_counter()
+    model = build_model(problem, relax)
+    if hint is not None and not relax:
+        _hint(model, hint)
+    build_seconds = time.perf_counter() - started
+
+    solver_name = LP_SOLVER if relax else MIP_SOLVER
+    started = time.perf_counter()
+    deadline = started + float(time_limit) if time_limit else None
+    sliced = (progress is not None or cancel is not None) and not relax
+    slice_seconds = FIRST_SLICE_SECONDS
+    while True:
+        limit = float(time_limit) if time_limit else None
+        if sliced:
+            limit = slice_seconds if deadline is None else min(slice_seconds, max(deadline - time.perf_counter(), 0.01))
+        tick = time.perf_counter()
+        solver = _run(model, solver_name, limit, gap, threads, cancel)
+        if not sliced or solver.status() not in (mbh.SolveStatus.FEASIBLE, mbh.SolveStatus.NOT_SOLVED):
+            break
+        # Stop at the caller's limit, on a cancel, or when the solver gave up before the slice ran out
+        now = time.perf_counter()
+        if (deadline is not None and now >= deadline) or (cancel is not None and cancel.cancelled) \
+                or now - tick < 0.9 * limit:
+            break
+        if solver.has_solution():
+            model.clear_hints()
+            _hint(model, solver.variable_values())
+            if progress is not None:
+                bound = solver.best_objective_bound()
+                progress({"objective": solver.objective_value(), "best_bound": bound if abs(bound) < 1e20 else None,
+                          "seconds": round(now - started, 3)})
+        slice_seconds *= 2
+    solve_seconds = time.perf_counter() - started
+
+    status = solver.status()
+    has_solution = status in (mbh.SolveStatus.OPTIMAL, mbh.SolveStatus.FEASIBLE)
+    rows = []
+    if has_solution:
+        quantities = np.maximum(solver.variable_values(), 0)
+        if problem.links is None:
+            plant_index, sku_index, amounts = split_over_plants(problem, quantities)
+        else:
+            keep = quantities > 1e-9
+            plant_index, sku_index, amounts = problem.links[keep, 0], problem.links[keep, 1], quantities[keep]
+        order = np.lexsort((sku_index, plant_index))
+        rows = [
+            {"Plant": problem.plants[p], "SKU": problem.skus[s], "Allocated": round(float(q), 2)}
+            for p, s, q in zip(plant_index[order], sku_index[order], amounts[order])
+        ]
+
+    objective = solver.objective_value() if has_solution else None
+    bound = solver.best_objective_bound() if has_solution and not relax else objective
+    report = {
+        "status": status.name,
+        "solver": solver_name,
+        "relaxed": bool(relax),
+        "objective": objective,
+        "best_bound": bound,
+        "gap": abs(bound - objective) / max(abs(objective), 1e-9) if has_solution else None,
+        "plants": len(problem.plants),
+        "skus": len(problem.skus),
+        "variables": model.num_variables(),
+        "constraints": model.num_constraints(),
+        "build_seconds": round(build_seconds, 4),
+        "solve_seconds": round(solve_seconds, 4),
+        "warm_start": hint is not None and not relax,
+    }
+    if has_solution:
+        report["quantities"] = quantities
+    return rows, report
+
+
+# ---------------- Solution cache & warm starts ----------------
+def _digest(*parts):
+    sha = hashlib.sha1()
+    for part in parts:
+        sha.update(part if isinstance(part, bytes) else repr(part).encode())
+        sha.update(b"|")
+    return sha.hexdigest()
+
+
+def _canonical_links(problem):
+    if problem.links is None:
+        return None
+    return sorted((problem.plants[p], problem.skus[s]) for p, s in problem.links)
+
+
+def problem_key(problem, relax=False, gap=None):
+    """Canonical hash: the same plants, SKUs and links in any order give the same key."""
+    plants = np.argsort(problem.plants, kind="stable")
+    skus = np.argsort(problem.skus, kind="stable")
+    return "alloc:" + _digest(
+        [problem.plants[i] for i in plants], problem.capacity[plants].tobytes(),
+        [problem.skus[j] for j in skus], problem.demand[skus].tobytes(), problem.profit[skus].tobytes(),
+        _canonical_links(problem), bool(relax), gap,
+    )
+
+
+def structure_key(problem):
+    """Same plants, SKUs and links, whatever the numbers: a previous solution makes a good hint."""
+    return "alloc-hint:" + _digest(sorted(problem.plants), sorted(problem.skus), _canonical_links(problem))
+
+
+def _load(key):
+    try:
+        body = shared_store.get(key) if shared_store.max_bytes else None
+    except sqlite3.Error as e:
+        print("⚠️ Solution cache read failed:", str(e))
+        return None
+    return json.loads(body) if body is not None else None
+
+
+def _save(key, value):
+    if not shared_store.max_bytes:
+        return
+    try:
+        shared_store.put(key, json.dumps(value).encode())
+    except sqlite3.Error as e:
+        print("⚠️ Solution cache write failed:", str(e))
+
+
+def _lookup(problem, relax, gap):
+    """(cached (rows, report) or None, warm-start hint or None) for one problem."""
+    cached = _load(problem_key(problem, relax, gap))
+    if cached is not None:
+        return (cached["rows"], {**cached["report"], "cache": "hit", "build_seconds": 0.0, "solve_seconds": 0.0}), None
+    previous = _load(structure_key(problem))
+    if previous is None:
+        return None, None
+    return None, np.array([previous.get(label, 0.0) for label in variable_labels(problem)])
+
+
+def _remember(problem, relax, gap, rows, report):
+    """Store an OPTIMAL result and the solution as the next hint; returns the report without quantities."""
+    quantities = report.pop("quantities", None)
+    report["cache"] = "miss"
+    if report["status"] == "OPTIMAL":
+        _save(problem_key(problem, relax, gap), {"rows": rows, "report": report})
+    if quantities is not None:
+        _save(structure_key(problem), dict(zip(variable_labels(problem), quantities.tolist())))
+    return report
+
+
+def solve_cached(problem, relax=False, time_limit=None, gap=None, threads=None, cancel=None, progress=None):
+    """
+    solve_allocation with memoized exact solves and warm starts. An identical
+    problem (canonical hash) returns its stored optimum; a problem with the
+    same plants and SKUs but edited numbers starts from the last solution.
+    Only OPTIMAL results are memoized, so a time-limited solve is retried.
+    """
+    cached, hint = _lookup(problem, relax, gap)
+    if cached is not None:
+        return cached
+    rows, report = solve_allocation(problem, relax, time_limit, gap, threads, hint=hint, cancel=cancel,
+                                    progress=progress)
+    return rows, _remember(problem, relax, gap, rows, report)
+
+
+# ---------------- Decomposition ----------------
+def components(problem):
+    """
+    Independent subproblems: connected components of the plant–SKU link
+    graph, as a list of (plant indices, sku indices). Plants or SKUs
+    without links can receive nothing and are left out. Without links the
+    whole problem is one component.
+    """
+    if problem.links is None:
+        return [(np.arange(len(problem.plants)), np.arange(len(problem.skus)))]
+    n_plants, n_nodes = len(problem.plants), len(problem.plants) + len(problem.skus)
+    if not len(problem.links):
+        return []
+    graph = sp.coo_matrix(
+        (np.ones(len(problem.links)), (problem.links[:, 0], n_plants + problem.links[:, 1])),
+        shape=(n_nodes, n_nodes),
+    )
+    _, labels = connected_components(graph, directed=False)
+    linked = np.zeros(n_nodes, dtype=bool)
+    linked[problem.links[:, 0]] = True
+    linked[n_plants + problem.links[:, 1]] = True
+
+    nodes = np.flatnonzero(linked)
+    nodes = nodes[np.argsort(labels[nodes], kind="stable")]
+    bounds = np.flatnonzero(np.diff(labels[nodes])) + 1
+    return [
+        (group[group < n_plants], group[group >= n_plants] - n_plants)
+        for group in np.split(nodes, bounds)
+    ]
+
+
+def solve_units(problem, max_variables=UNIT_VARIABLES):
+    """
+    Components packed, in order, into units of up to `max_variables` links.
+    Each solver call has a fixed start-up cost, so tiny components are
+    solved (and cached) together; a larger component is a unit of its own.
+    The packing depends only on the link structure, so editing capacities
+    or demand re-solves just the units holding the edited plants and SKUs.
+    """
+    units, plants, skus, size = [], [], [], 0
+    plant_links = np.bincount(problem.links[:, 0], minlength=len(problem.plants))
+    for plant_index, sku_index in components(problem):
+        links = int(plant_links[plant_index].sum())
+        if plants and size + links > max_variables:
+            units.append((np.concatenate(plants), np.concatenate(skus)))
+            plants, skus, size = [], [], 0
+        plants.append(plant_index)
+        skus.append(sku_index)
+        size += links
+    if plants:
+        units.append((np.concatenate(plants), np.concatenate(skus)))
+    return units
+
+
+def subproblem(problem, plant_index, sku_index):
+    """The part of `problem` over the given plants and SKUs, links renumbered."""
+    links = None
+    if problem.links is not None:
+        plant_pos = np.full(len(problem.plants), -1)
+        plant_pos[plant_index] = np.arange(len(plant_index))
+        sku_pos = np.full(len(problem.skus), -1)
+        sku_pos[sku_index] = np.arange(len(sku_index))
+        inside = (plant_pos[problem.links[:, 0]] >= 0) & (sku_pos[problem.links[:, 1]] >= 0)
+        links = np.column_stack([plant_pos[problem.links[inside, 0]], sku_pos[problem.links[inside, 1]]])
+    return AllocationProblem(
+        plants=[problem.plants[i] for i in plant_index],
+        capacity=problem.capacity[plant_index],
+        skus=[problem.skus[j] for j in sku_index],
+        demand=problem.demand[sku_index],
+        profit=problem.profit[sku_index],
+        links=links,
+    )
+
+
+def _solve_batch(batch, relax, time_limit, gap, threads, cancel_path=None):
+    """
+    Solve (problem, hint) pairs; runs in pool workers. Once the cancel flag
+    at `cancel_path` appears, the running solve is interrupted and the rest
+    of the batch skipped (the results then cover a prefix of the batch).
+    """
+    results = []
+    with flag_token(cancel_path) as cancel:
+        for problem, hint in batch:
+            if cancel is not None and cancel.cancelled:
+                break
+            results.append(solve_allocation(problem, relax, time_limit, gap, threads, hint=hint, cancel=cancel))
+    return results
+
+
+def _combine(reports, relax, started):
+    """One report for a decomposed solve: totals across components."""
+    solved = [r for r in reports if r["objective"] is not None]
+    statuses = {r["status"] for r in reports}
+    objective = sum(r["objective"] for r in solved) if solved else None
+    bound = sum(r["best_bound"] for r in solved) if solved else None
+    hits = sum(r["cache"] == "hit" for r in reports)
+    return {
+        "status": "OPTIMAL" if statuses <= {"OPTIMAL"} else sorted(statuses - {"OPTIMAL"})[0],
+        "solver": LP_SOLVER if relax else MIP_SOLVER,
+        "relaxed": bool(relax),
+        "objective": objective,
+        "best_bound": bound,
+        "gap": abs(bound - objective) / max(abs(objective), 1e-9) if solved else None,
+        "plants": sum(r["plants"] for r in reports),
+        "skus": sum(r["skus"] for r in reports),
+        "variables": sum(r["variables"] for r in reports),
+        "constraints": sum(r["constraints"] for r in reports),
+        "build_seconds": round(sum(r["build_seconds"] for r in reports), 4),
+        "solve_seconds": round(sum(r["solve_seconds"] for r in reports), 4),
+        "warm_start": any(r["warm_start"] for r in reports),
+        "cache": "hit" if reports and hits == len(reports) else "partial" if hits else "miss",
+        "units_solved": len(reports) - hits,
+        "seconds": round(time.perf_counter() - started, 4),
+    }
+
+
+def solve_components(problem, relax=False, time_limit=None, gap=None, threads=None, workers=1,
+                     progress=None, cancel=None):
+    """
+    Solve the connected components separately (packed by solve_units) and
+    merge the results. Every unit is cached on its own, so after an edit
+    only the units it touches are re-solved; those run across `workers`
+    spawned processes (at most Config.ALLOCATION_WORKERS, from the one
+    shared pool) when there are several. A problem without links is one
+    component and goes straight to solve_cached.
+
+    `progress(dict)`, if given, receives the units finished and the
+    objective over them so far, plus the incumbent of the unit being solved
+    in this process (in time slices, see solve_allocation). `cancel` (a
+    workers.CancelToken) stops early: running solves are interrupted, in the
+    pool too, and the units finished so far come back with status CANCELLED.
+    """
+    started = time.perf_counter()
+    if problem.links is None:
+        unit_progress = None
+        if progress is not None:
+            def unit_progress(incumbent):
+                progress({"units_done": 0, "units": 1, **incumbent, "seconds": round(time.perf_counter() - started, 3)})
+        rows, report = solve_cached(problem, relax, time_limit, gap, threads, cancel=cancel, progress=unit_progress)
+        if cancel is not None and cancel.cancelled and report["status"] != "OPTIMAL":
+            report["status"] = "CANCELLED"
+        if progress is not None:
+            progress({"units_done": 1, "units": 1, "objective": report["objective"],
+                      "seconds": round(time.perf_counter() - started, 3)})
+        return rows, report
+
+    parts = [subproblem(problem, p, s) for p, s in solve_units(problem)]
+    results = [None] * len(parts)
+    pending = []
+    for index, part in enumerate(parts):
+        cached, hint = _lookup(part, relax, gap)
+        if cached is not None:
+            results[index] = cached
+        else:
+            pending.append((index, part, hint))
+
+    reported = [0.0]
+
+    def report_progress(now, running=None):
+        reported[0] = now
+        finished = [r for _, r in filter(None, results)]
+        progress({
+            "units_done": len(finished),
+            "units": len(parts),
+            # incumbent over finished units, plus the unit being solved here
+            "objective": sum(r["objective"] or 0.0 for r in finished) + (running or 0.0),
+            "seconds": round(now - started, 3),
+        })
+
+    def finish(index, part, rows, report):
+        results[index] = (rows, _remember(part, relax, gap, rows, report))
+        now = time.perf_counter()
+        if progress is not None and now - reported[0] >= PROGRESS_SECONDS:
+            report_progress(now)
+
+    unit_progress = None
+    if progress is not None:
+        def unit_progress(incumbent):
+            report_progress(time.perf_counter(), incumbent["objective"])
+
+    pool_size = max(1, Config.ALLOCATION_WORKERS)
+    workers = max(1, min(workers, pool_size, len(pending)))
+    if workers == 1:
+        for index, part, hint in pending:
+            if cancel is not None and cancel.cancelled:
+                break
+            finish(index, part, *solve_allocation(part, relax, time_limit, gap, threads, hint=hint, cancel=cancel,
+                                                  progress=unit_progress))
+    else:
+        batches = split_batches(pending, workers, pool_size)
+        pool = worker_pool(pool_size)
+        try:
+            with cancel_flag(cancel) as flag:
+                futures = {
+                    pool.submit(_solve_batch, [(part, hint) for _, part, hint in batch],
+                                relax, time_limit, gap, threads, flag): batch
+                    for batch in batches
+                }
+                not_done, dropped = set(futures), False
+                while not_done:
+                    done, not_done = wait(not_done, timeout=PROGRESS_SECONDS, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        if not future.cancelled():
+                            for (index, part, _), solved in zip(futures[future], future.result()):
+                                finish(index, part, *solved)
+                    if cancel is not None and cancel.cancelled and not dropped:
+                        # Batches not started are dropped; running ones see the flag, stop and are collected
+                        not_done = {future for future in not_done if not future.cancel()}
+                        dropped = True
+        except BrokenProcessPool:
+            discard_pool(pool_size)
+            raise
+
+    if progress is not None:
+        report_progress(time.perf_counter())
+    finished = list(filter(None, results))
+    rows = sorted((row for part_rows, _ in finished for row in part_rows), key=lambda r: (r["Plant"], r["SKU"]))
+    report = _combine([r for _, r in finished], relax, started)
+    report.update(units=len(parts), workers=workers)
+    if cancel is not None and cancel.cancelled and (len(finished) < len(parts) or report["status"] != "OPTIMAL"):
+        report["status"] = "CANCELLED"
+    return rows, report
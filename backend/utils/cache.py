@@ -0,0 +1,150 @@
+# utils/cache.py
+import hashlib
+import sqlite3
+import threading
+import time
+from functools import wraps
+
+from flask import current_app, request
+from config import Config
+from models import db, DatasetVersion
+
+
+# ---------------- Dataset version ----------------
+def dataset_version():
+    """Current dataset version (0 before the first upload)."""
+    table = DatasetVersion.__table__
+    return db.session.execute(db.select(table.c.version).where(table.c.id == 1)).scalar() or 0
+
+
+def bump_version(previous=0):
+    """
+    Advance the dataset version in the caller's transaction (caller commits).
+    `previous` is the version to continue from when the row is missing,
+    e.g. after /reset recreated the schema.
+    """
+    table = DatasetVersion.__table__
+    bumped = db.session.execute(
+        table.update().where(table.c.id == 1).values(version=table.c.version + 1)
+    ).rowcount
+    if not bumped:
+        db.session.execute(table.insert().values(id=1, version=previous + 1))
+
+
+# ---------------- Response store ----------------
+TOUCH_SECONDS = 60   # LRU recency resolution: a hit refreshes `used` at most this often
+class ResponseStore:
+    """
+    Size-bounded LRU of response bodies in a SQLite file, shared by every
+    worker process on the host. Entries are never invalidated: keys include
+    the dataset version, so stale ones simply age out.
+    """
+
+    def __init__(self, path, max_bytes):
+        self.path = path
+        self.max_bytes = max_bytes
+        self._local = threading.local()
+
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS responses "
+                "(key TEXT PRIMARY KEY, body BLOB NOT NULL, size INTEGER NOT NULL, used REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS ix_responses_used ON responses (used)")
+            self._local.conn = conn
+        return conn
+
+    def get(self, key):
+        conn = self._conn()
+        row = conn.execute("SELECT body, used FROM responses WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return None
+        # Hits only take the write lock once the recency stamp is stale
+        now = time.time()
+        if now - row[1] >= TOUCH_SECONDS:
+            conn.execute("UPDATE responses SET used = ? WHERE key = ?", (now, key))
+        return row[0]
+
+    def put(self, key, body):
+        if len(body) > self.max_bytes:
+            return
+        conn = self._conn()
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.execute(
+                "INSERT OR REPLACE INTO responses (key, body, size, used) VALUES (?, ?, ?, ?)",
+                (key, body, len(body), time.time()),
+            )
+            # Evict least recently used entries beyond the size bound
+            conn.execute(
+                "DELETE FROM responses WHERE key IN ("
+                " SELECT key FROM (SELECT key, SUM(size) OVER (ORDER BY used DESC) AS running FROM responses)"
+                " WHERE running > ?)",
+                (self.max_bytes,),
+            )
+
+
+# Also holds memoized solver results (utils/allocation.py), under their own key prefix
+shared_store = ResponseStore(Config.RESPONSE_CACHE_PATH, Config.RESPONSE_CACHE_MAX_MB * 1024 * 1024)
+
+
+def cache_key(req, version, extra=""):
+    """Endpoint + query parameters + database + dataset version (+ any other input the view reads)."""
+    params = sorted(req.args.items(multi=True))
+    raw = f"{current_app.config['SQLALCHEMY_DATABASE_URI']}|{req.path}|{params}|v{version}|{extra}"
+    return hashlib.sha1(raw.encode()).hexdigest()
+
+
+def cached_response(view=None, vary=None):
+    """
+    Serve a read endpoint from the shared response cache, with an ETag
+    derived from the same key. A matching If-None-Match gets a 304 before
+    the view runs. Only 200 JSON responses are stored; errors always go
+    through to the view. `vary`, if given, returns a stamp of inputs
+    outside the database (e.g. a file's mtime) that goes into the key:
+    @cached_response(vary=...).
+    """
+    if view is None:
+        return lambda view: cached_response(view, vary)
+
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        key = cache_key(request, dataset_version(), vary() if vary else "")
+        if request.if_none_match.contains(key):
+            return _tagged(current_app.response_class(status=304), key)
+
+        body = None
+        if shared_store.max_bytes:
+            try:
+                body = shared_store.get(key)
+            except sqlite3.Error as e:
+                print("⚠️ Response cache read failed:", str(e))
+        if body is not None:
+            response = current_app.response_class(body, mimetype="application/json")
+            response.headers["X-Cache"] = "HIT"
+            return _tagged(response, key)
+
+        response = current_app.make_response(view(*args, **kwargs))
+        if response.status_code != 200:
+            return response
+        if shared_store.max_bytes and response.is_json:
+            try:
+                shared_store.put(key, response.get_data())
+            except sqlite3.Error as e:
+                print("⚠️ Response cache write failed:", str(e))
+        response.headers["X-Cache"] = "MISS"
+        return _tagged(response, key)
+
+    return wrapper
+
+
+def _tagged(response, key):
+    # no-cache: browsers keep the body but revalidate with If-None-Match every time
+    response.set_etag(key)
+    response.headers["Cache-Control"] = "no-cache"
+    return response
@@ -1,74 +1,113 @@
-import pandas as pd
+from concurrent.futures import ThreadPoolExecutor
+
+from config import Config
 from models import db, Demand, Production, Inventory, Supplier
+from utils.ingest import Field, TableSpec, bulk_insert, read_frame
+from utils.cache import bump_version
+from utils.summaries import refresh_summaries
+
+# ---------------- Column routing ----------------
+# Generic loader specs over lower-cased headers. A file is routed to every
+# table whose required columns it has; the first matching spec per table wins.
+# SKUs are upper-cased and regions / plants title-cased, as the upload routes do.
+LOADER_SPECS = [
+    TableSpec(Demand, [
+        Field("week", "week", "int"),
+        Field("sku", "sku", "upper"),
+        Field("region", "region", "title"),
+        Field("forecast_demand", "forecast", "int"),
+        Field("actual_demand", "actual", "int"),
+    ]),
+    TableSpec(Production, [
+        Field("week", "week", "int"),
+        Field("sku", "sku", "upper"),
+        Field("plant", "plant", "title"),
+        Field("capacity", "capacity", "int"),
+        Field("produced", "produced", "int"),
+    ]),
+    TableSpec(Inventory, [
+        Field("week", "week", "int"),
+        Field("sku", "sku", "upper"),
+        Field("region", "region", "title"),
+        Field("stock", "stock", "int"),
+        Field("forecast", "forecast", "int", required=False),
+    ]),
+    # Supplier master data (same layout as /upload_suppliers)
+    TableSpec(Supplier, [
+        Field("supplier_id", "supplier_id", "str"),
+        Field("name", "name", "str"),
+        Field("committed_lead_time", "committed_lead_time", "int", required=False),
+        Field("avg_lead_time_days", "avg_lead_time", "int", required=False),
+        Field("deliveries", "deliveries", "int", required=False),
+        Field("on_time_deliveries", "on_time_deliveries", "int", required=False),
+        Field("material", "material", "str", required=False),
+        Field("sku_linked", "sku_linked", "upper", required=False),
+        Field("unit_cost", "unit_cost", "float", required=False),
+        Field("min_order_qty", "min_order_qty", "int", required=False),
+        Field("max_capacity", "max_capacity", "int", required=False),
+        Field("lead_time_days", "lead_time_days", "int", required=False),
+    ]),
+    # Legacy FreshBites export: a single "supplier" column names the supplier
+    TableSpec(Supplier, [
+        Field("supplier", "supplier_id", "str"),
+        Field("supplier", "name", "str"),
+        Field("raw_material", "material", "str", required=False),
+        Field("lead_time", "lead_time_days", "int", required=False),
+    ]),
+]
 
-def load_csv_to_db(filepath):
-    """Parse FreshBites CSV (any subset of columns) and insert data into DB."""
 
-    df = pd.read_csv(filepath)
+def route_columns(columns):
+    """Decide once which table specs a file's columns map to."""
+    routed = {}
+    for spec in LOADER_SPECS:
+        if spec.model not in routed and spec.required.issubset(columns):
+            routed[spec.model] = spec
+    return list(routed.values())
+
+
+def stage_file(filepath, fmt=None):
+    """Parse one FreshBites file (any subset of columns) into one frame per table."""
+    df = read_frame(filepath, fmt)
 
     # Normalize columns to lowercase
     df.columns = [col.strip().lower() for col in df.columns]
 
-    # Buffers for bulk insert
-    demand_records, prod_records, inv_records, supplier_records = [], [], [], []
+    return [(spec.model, spec.transform(df)) for spec in route_columns(df.columns)]
 
-    for _, row in df.iterrows():
-        # ---------------- DEMAND ----------------
-        if {"week", "sku", "region", "forecast_demand", "actual_demand"}.issubset(df.columns):
-            demand_records.append(
-                Demand(
-                    week=row["week"],
-                    sku=row["sku"],
-                    region=row["region"],
-                    forecast=row["forecast_demand"],
-                    actual=row["actual_demand"],
-                )
-            )
 
-        # ---------------- PRODUCTION ----------------
-        if {"week", "sku", "plant", "capacity", "produced"}.issubset(df.columns):
-            prod_records.append(
-                Production(
-                    week=row["week"],
-                    sku=row["sku"],
-                    plant=row["plant"],
-                    capacity=row["capacity"],
-                    produced=row["produced"],
-                )
-            )
+def load_files_to_db(filepaths, formats=None, progress=None):
+    """
+    Parse several files (CSV, Parquet or Arrow IPC) concurrently, then insert
+    every staged frame (one statement per table per file) and commit once.
+    `formats` optionally gives each file's format when its extension doesn't;
+    `progress`, if given, is called with a dict as files are staged and inserted.
+    Returns row counts per table.
+    """
+    formats = formats or [None] * len(filepaths)
+    workers = max(1, min(Config.LOADER_WORKERS, len(filepaths)))   # read_csv releases the GIL
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        staged = list(pool.map(stage_file, filepaths, formats))
+    if progress is not None:
+        progress({"phase": "inserting", "files": len(filepaths), "rows": 0})
 
-        # ---------------- INVENTORY ----------------
-        if {"week", "sku", "region", "stock"}.issubset(df.columns):
-            inv_records.append(
-                Inventory(
-                    week=row["week"],
-                    sku=row["sku"],
-                    region=row["region"],
-                    stock=row["stock"],
-                )
-            )
+    counts = {model.__tablename__: 0 for model in (Demand, Production, Inventory, Supplier)}
+    try:
+        for frames in staged:
+            for model, frame in frames:
+                counts[model.__tablename__] += bulk_insert(model.__table__, frame)
+        refresh_summaries([name for name, rows in counts.items() if rows])
+        bump_version()
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
 
-        # ---------------- SUPPLIERS ----------------
-        if "supplier" in df.columns:
-            supplier_records.append(
-                Supplier(
-                    name=row["supplier"],
-                    raw_material=row.get("raw_material", None),
-                    lead_time=row.get("lead_time", None),
-                    on_time=row.get("on_time", None),
-                )
-            )
+    print(f"✅ Loaded {counts['demand']} demand, {counts['production']} production, "
+          f"{counts['inventory']} inventory, {counts['suppliers']} suppliers from {len(filepaths)} file(s)")
+    return counts
 
-    # Bulk insert (efficient)
-    if demand_records:
-        db.session.bulk_save_objects(demand_records)
-    if prod_records:
-        db.session.bulk_save_objects(prod_records)
-    if inv_records:
-        db.session.bulk_save_objects(inv_records)
-    if supplier_records:
-        db.session.bulk_save_objects(supplier_records)
 
-    db.session.commit()
-    print(f"✅ Loaded {len(demand_records)} demand, {len(prod_records)} production, "
-          f"{len(inv_records)} inventory, {len(supplier_records)} suppliers from {filepath}")
+def load_csv_to_db(filepath):
+    """Parse a FreshBites file (any subset of columns) and insert data into DB."""
+    return load_files_to_db([filepath])
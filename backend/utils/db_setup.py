@@ -0,0 +1,45 @@
+# utils/db_setup.py
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+
+
+def engine_options(config):
+    """SQLALCHEMY_ENGINE_OPTIONS for the configured database."""
+    options = {
+        "pool_size": config.DB_POOL_SIZE,
+        "max_overflow": config.DB_MAX_OVERFLOW,
+        "pool_timeout": config.DB_POOL_TIMEOUT,
+    }
+    url = make_url(config.DATABASE_URL)
+    if url.get_backend_name() == "sqlite":
+        # In-memory SQLite lives in a single connection; keep SQLAlchemy's default pool
+        if url.database in (None, "", ":memory:"):
+            return {}
+        # busy timeout is set as a pragma on connect; this covers the driver's own lock wait
+        options["connect_args"] = {"timeout": config.SQLITE_BUSY_TIMEOUT_MS / 1000}
+    else:
+        # Server databases drop idle connections; check and recycle them
+        options["pool_pre_ping"] = True
+        options["pool_recycle"] = config.DB_POOL_RECYCLE
+    return options
+
+
+def register_sqlite_pragmas(engine, config):
+    """Apply journal / sync / mmap / cache / busy-timeout pragmas to every new SQLite connection."""
+    if engine.dialect.name != "sqlite":
+        return
+
+    pragmas = [
+        f"PRAGMA journal_mode={config.SQLITE_JOURNAL_MODE}",
+        f"PRAGMA synchronous={config.SQLITE_SYNCHRONOUS}",
+        f"PRAGMA mmap_size={int(config.SQLITE_MMAP_SIZE)}",
+        f"PRAGMA cache_size={int(config.SQLITE_CACHE_SIZE)}",
+        f"PRAGMA busy_timeout={int(config.SQLITE_BUSY_TIMEOUT_MS)}",
+    ]
+
+    @event.listens_for(engine, "connect")
+    def _apply_pragmas(dbapi_connection, _):
+        cursor = dbapi_connection.cursor()
+        for pragma in pragmas:
+            cursor.execute(pragma)
+        cursor.close()
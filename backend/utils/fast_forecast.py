@@ -0,0 +1,96 @@
+# utils/fast_forecast.py
+# Vectorized forecasts over a 2-D series × weeks array: each method steps
+# through the weeks once and updates every series together. Missing weeks
+# are NaN (leading NaNs pad shorter series; inner NaNs leave the state as is).
+# Methods return a series × periods array, NaN for rows with no history.
+import numpy as np
+
+
+def _prepare(Y):
+    Y = np.atleast_2d(np.asarray(Y, dtype=np.float64))
+    valid = ~np.isnan(Y)
+    rows = np.arange(Y.shape[0])
+    first = np.where(valid.any(axis=1), valid.argmax(axis=1), Y.shape[1])
+    start = Y[rows, np.minimum(first, Y.shape[1] - 1)]
+    start[first == Y.shape[1]] = np.nan
+    return Y, valid, first, start
+
+
+def ses(Y, periods, alpha=0.3):
+    """Simple exponential smoothing: flat forecast at the final level."""
+    Y, valid, first, level = _prepare(Y)
+    for t in range(Y.shape[1]):
+        step = valid[:, t] & (t > first)
+        level = np.where(step, alpha * Y[:, t] + (1 - alpha) * level, level)
+    return np.repeat(level[:, None], periods, axis=1)
+
+
+def holt(Y, periods, alpha=0.3, beta=0.1):
+    """Holt's linear trend: level + h × trend."""
+    Y, valid, first, level = _prepare(Y)
+    trend = np.zeros_like(level)
+    for t in range(Y.shape[1]):
+        step = valid[:, t] & (t > first)
+        new_level = alpha * Y[:, t] + (1 - alpha) * (level + trend)
+        trend = np.where(step, beta * (new_level - level) + (1 - beta) * trend, trend)
+        level = np.where(step, new_level, level)
+    return level[:, None] + trend[:, None] * np.arange(1, periods + 1)
+
+
+def seasonal_naive(Y, periods, season=52):
+    """
+    Repeat the last full season (the last value when the history is shorter).
+
+    >>> seasonal_naive([[1, 2, 3, 4], [np.nan, np.nan, 5, 6]], 3, season=4)
+    array([[1., 2., 3.],
+           [6., 6., 6.]])
+    """
+    Y = np.atleast_2d(np.asarray(Y, dtype=np.float64))
+    # Fill gaps forward so each row's last season is defined
+    filled = Y.copy()
+    for t in range(1, Y.shape[1]):
+        gap = np.isnan(filled[:, t])
+        filled[gap, t] = filled[gap, t - 1]
+    season = season if 1 <= season <= Y.shape[1] else 1
+    last = filled[:, -season:]
+    # Rows whose own history is shorter than the season repeat their last value
+    short = np.isnan(last).any(axis=1)
+    last[short] = filled[short, -1:]
+    return last[:, np.arange(periods) % season]
+
+
+def croston(Y, periods, alpha=0.1):
+    """Croston's method for intermittent demand: smoothed size / smoothed interval."""
+    Y = np.atleast_2d(np.asarray(Y, dtype=np.float64))
+    valid = ~np.isnan(Y)
+    demand = valid & (np.nan_to_num(Y) > 0)
+    rows = np.arange(Y.shape[0])
+    has_demand = demand.any(axis=1)
+    first = np.where(has_demand, demand.argmax(axis=1), Y.shape[1])
+
+    size = np.where(has_demand, Y[rows, np.minimum(first, Y.shape[1] - 1)], 0.0)
+    interval = np.ones(Y.shape[0])
+    since = np.ones(Y.shape[0])   # weeks since the last demand
+    for t in range(Y.shape[1]):
+        step = demand[:, t] & (t > first)
+        size = np.where(step, alpha * Y[:, t] + (1 - alpha) * size, size)
+        interval = np.where(step, alpha * since + (1 - alpha) * interval, interval)
+        since = np.where(step, 1, since + ((t > first) & valid[:, t]))
+
+    rate = np.where(valid.any(axis=1), size / interval, np.nan)
+    return np.repeat(rate[:, None], periods, axis=1)
+
+
+METHODS = {
+    "ses": ses,
+    "holt": holt,
+    "seasonal_naive": seasonal_naive,
+    "croston": croston,
+}
+
+
+def fast_forecast(Y, periods, method="ses", **params):
+    """Forecast every row of `Y` `periods` weeks ahead with one of METHODS."""
+    if method not in METHODS:
+        raise ValueError(f"Unknown forecast method '{method}' (use one of {sorted(METHODS)})")
+    return METHODS[method](Y, periods, **params)
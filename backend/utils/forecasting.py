@@ -0,0 +1,307 @@
+# utils/forecasting.py
+import hashlib
+import threading
+import time
+import warnings
+from collections import OrderedDict
+from concurrent.futures import wait
+from concurrent.futures.process import BrokenProcessPool
+from itertools import repeat
+
+import numpy as np
+from statsmodels.tsa.arima.model import ARIMA
+
+from config import Config
+from utils.workers import discard_pool, split_batches, worker_pool
+
+ARIMA_ORDER = (1, 1, 1)
+NO_SEASON = (0, 0, 0, 0)
+
+
+# ---------------- Fitted model cache ----------------
+class FittedModelCache:
+    """
+    Per-process LRU of fitted ARIMA results, keyed by series hash + order.
+    Entries older than `ttl` seconds are refitted. A fitted result can
+    forecast any horizon, so `periods` is not part of the key.
+    """
+
+    def __init__(self, max_size, ttl):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()   # key → (fitted_at, result)
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and time.monotonic() - entry[0] <= self.ttl:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            self._entries.pop(key, None)
+            self.misses += 1
+            return None
+
+    def put(self, key, result):
+        if self.max_size <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (time.monotonic(), result)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "ttl_seconds": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            }
+
+
+model_cache = FittedModelCache(Config.FORECAST_CACHE_SIZE, Config.FORECAST_CACHE_TTL)
+# auto_arima order selections, kept apart so they neither evict fitted models nor skew their counters
+selection_cache = FittedModelCache(Config.AUTO_ARIMA_CACHE_SIZE, Config.FORECAST_CACHE_TTL)
+
+
+def series_key(values, order):
+    """Stable hash of a series (as float64) and the model order (any hashable spec)."""
+    values = np.ascontiguousarray(values, dtype=np.float64)
+    return hashlib.sha1(values.tobytes() + repr(tuple(order)).encode()).hexdigest()
+
+
+def fitted_arima(series, order=ARIMA_ORDER, seasonal_order=NO_SEASON):
+    """Fitted ARIMA results for `series`, from the cache when possible."""
+    values = np.asarray(series, dtype=np.float64)
+    key = series_key(values, (tuple(order), tuple(seasonal_order)))
+    result = model_cache.get(key)
+    if result is None:
+        result = ARIMA(values, order=order, seasonal_order=seasonal_order).fit()
+        model_cache.put(key, result)
+    return result
+
+
+def arima_forecast(series, periods, order=ARIMA_ORDER, seasonal_order=NO_SEASON):
+    """Forecast `periods` steps ahead of `series` as a list of floats."""
+    return np.asarray(fitted_arima(series, order, seasonal_order).forecast(steps=periods)).tolist()
+
+
+# ---------------- Automatic order selection ----------------
+MAX_P, MAX_Q, MAX_D = 3, 3, 2
+SEARCH_BEAM = 2   # best orders of each round whose neighbours get fitted next
+
+
+class _OutOfTime(Exception):
+    pass
+
+
+def _candidate_aic(values, order, seasonal_order, stop_at=None):
+    """
+    AIC of one candidate fit (inf when it fails); runs in pool workers. A fit
+    still optimizing at `stop_at` (time.time()) is abandoned and gives None,
+    so one cut short by the search budget doesn't keep holding a pool process.
+    """
+    def check_time(params):
+        if time.time() >= stop_at:
+            raise _OutOfTime()
+
+    try:
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore")
+            model = ARIMA(values, order=order, seasonal_order=seasonal_order)
+            aic = model.fit(method_kwargs={"callback": check_time} if stop_at else None).aic
+        return aic if np.isfinite(aic) else np.inf
+    except _OutOfTime:
+        return None
+    except Exception:
+        return np.inf
+
+
+def differencing_order(values):
+    """Smallest d (up to MAX_D) whose differenced series passes a KPSS stationarity test."""
+    from statsmodels.tsa.stattools import kpss
+
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")   # p-value outside the lookup table
+        for d in range(MAX_D):
+            diffed = np.diff(values, n=d)
+            if len(diffed) < 4 or np.ptp(diffed) == 0 or kpss(diffed, nlags="auto")[1] > 0.05:
+                return d
+    return MAX_D
+
+
+def _neighbours(spec, seasonal, max_terms):
+    p, q, P, Q = spec
+    steps = [(1, 0, 0, 0), (0, 1, 0, 0), (-1, 0, 0, 0), (0, -1, 0, 0)]
+    if seasonal:
+        steps += [(0, 0, 1, 0), (0, 0, 0, 1), (0, 0, -1, 0), (0, 0, 0, -1)]
+    for dp, dq, dP, dQ in steps:
+        cand = (p + dp, q + dq, P + dP, Q + dQ)
+        if (0 <= cand[0] <= MAX_P and 0 <= cand[1] <= MAX_Q and 0 <= cand[2] <= 1 and 0 <= cand[3] <= 1
+                and sum(cand) <= max_terms):
+            yield cand
+
+
+def select_order(series, seasonal_period=None, budget=10.0, workers=1):
+    """
+    Pick (p,d,q)(P,D,Q,s) by AIC. d comes from a KPSS test; p, q (and P, Q
+    when `seasonal_period` is given) are searched stepwise: each round fits
+    the neighbours of the best SEARCH_BEAM orders so far in parallel, and the
+    search stops once a round brings no improvement or `budget` seconds pass.
+    """
+    started = time.perf_counter()
+    deadline = started + budget
+    values = np.asarray(series, dtype=np.float64)
+    d = differencing_order(values)
+    s = int(seasonal_period or 0)
+    seasonal = s > 1 and len(values) >= 2 * s
+    max_terms = max(0, (len(values) - d) // 3 - 1)   # keep ~3 observations per parameter
+
+    def orders(spec):
+        p, q, P, Q = spec
+        return (p, d, q), ((P, 0, Q, s) if seasonal and (P or Q) else NO_SEASON)
+
+    scores = {}
+    pending = [spec for spec in [(0, 0, 0, 0), (1, 0, 0, 0), (0, 1, 0, 0), (1, 1, 0, 0)] if sum(spec) <= max_terms]
+    if seasonal:
+        pending += [spec for spec in [(1, 1, 1, 0), (1, 1, 0, 1)] if sum(spec) <= max_terms]
+    timed_out = False
+    while pending and not timed_out:
+        best_before = min(scores.values(), default=np.inf)
+        timed_out = _fit_round(values, pending, orders, scores, deadline, workers)
+        ranked = sorted(scores, key=scores.get)
+        if min(scores.values(), default=np.inf) >= best_before:
+            break   # no candidate in this round improved on the best so far
+        pending = list(dict.fromkeys(
+            cand for spec in ranked[:SEARCH_BEAM] for cand in _neighbours(spec, seasonal, max_terms)
+            if cand not in scores
+        ))
+
+    best = min(scores, key=scores.get) if scores else (1, 0, 1, 0)
+    best_aic = scores.get(best, np.inf)
+    order, seasonal_order = orders(best)
+    return {
+        "order": order,
+        "seasonal_order": seasonal_order,
+        "aic": round(float(best_aic), 3) if np.isfinite(best_aic) else None,
+        "candidates": len(scores),
+        "timed_out": timed_out,
+        "search_seconds": round(time.perf_counter() - started, 3),
+    }
+
+
+def _fit_round(values, specs, orders, scores, deadline, workers):
+    """
+    Score `specs` into `scores`; returns True when the deadline cut the round
+    short. Fits run on the shared Config.FORECAST_WORKERS pool, at most
+    `workers` at a time, and give up at the deadline themselves.
+    """
+    pool_size = max(1, Config.FORECAST_WORKERS)
+    workers = max(1, min(workers, pool_size))
+    stop_at = time.time() + (deadline - time.perf_counter())   # pool processes don't share perf_counter
+    if workers <= 1:
+        for spec in specs:
+            if time.perf_counter() >= deadline:
+                return True
+            score = _candidate_aic(values, *orders(spec), stop_at)
+            if score is None:
+                return True
+            scores[spec] = score
+        return False
+
+    pool = worker_pool(pool_size)
+    wave = len(specs) if workers >= pool_size else workers
+    for start in range(0, len(specs), wave):
+        futures = {
+            pool.submit(_candidate_aic, values, *orders(spec), stop_at): spec
+            for spec in specs[start:start + wave]
+        }
+        done, not_done = wait(futures, timeout=max(0.0, deadline - time.perf_counter()))
+        abandoned = False
+        for future in done:
+            score = future.result()
+            if score is None:
+                abandoned = True
+            else:
+                scores[futures[future]] = score
+        if not_done or abandoned:
+            for future in not_done:
+                future.cancel()   # running fits stop at their next optimizer step
+            return True
+    return False
+
+
+def auto_arima_forecast(series, periods, seasonal_period=None, budget=10.0, workers=1):
+    """
+    Forecast with the order chosen by select_order. Completed selections are
+    cached (selection_cache) and so is the fit, so a repeat call only pays for the forecast.
+    Returns (forecast list, selection dict).
+    """
+    started = time.perf_counter()
+    values = np.asarray(series, dtype=np.float64)
+    key = series_key(values, ("auto", seasonal_period))
+    selection = selection_cache.get(key)
+    if selection is None:
+        selection = select_order(values, seasonal_period, budget, workers)
+        if not selection["timed_out"]:   # a cut-short search may do better with more budget
+            selection_cache.put(key, selection)
+    forecast = arima_forecast(values, periods, selection["order"], selection["seasonal_order"])
+    return forecast, {**selection, "fit_seconds": round(time.perf_counter() - started, 3)}
+
+
+# ---------------- Batch fitting ----------------
+# Runs in spawned worker processes: keep this section free of Flask and the DB.
+def _fit_batch(batch, periods, order):
+    """Fit one batch of (sku, region, values); returns (sku, region, forecast, error) tuples."""
+    out = []
+    for sku, region, values in batch:
+        try:
+            if len(values) < 3:
+                raise ValueError("Need at least 3 data points")
+            with warnings.catch_warnings():
+                warnings.simplefilter("ignore")   # statsmodels convergence chatter, per series
+                fit = ARIMA(np.asarray(values, dtype=np.float64), order=order).fit()
+            out.append((sku, region, np.asarray(fit.forecast(steps=periods)).tolist(), None))
+        except Exception as e:
+            out.append((sku, region, None, str(e)))
+    return out
+
+
+def forecast_many(series, periods, workers, order=ARIMA_ORDER, progress=None):
+    """
+    Fit every (sku, region, values) in `series` across `workers` spawned
+    processes (at most Config.FORECAST_WORKERS, from the one shared pool),
+    in batches so each task amortizes its pickling overhead.
+    `progress`, if given, is called with the number of series done so far.
+    Returns (sku, region, forecast, error) tuples.
+    """
+    if not series:
+        return []
+    pool_size = max(1, Config.FORECAST_WORKERS)
+    workers = max(1, min(workers, pool_size, len(series)))
+    batches = split_batches(series, workers, pool_size)
+
+    if workers == 1:
+        return _collect(map(_fit_batch, batches, repeat(periods), repeat(order)), progress)
+    try:
+        return _collect(worker_pool(pool_size).map(_fit_batch, batches, repeat(periods), repeat(order)), progress)
+    except BrokenProcessPool:
+        discard_pool(pool_size)
+        raise
+
+
+def _collect(outputs, progress):
+    results = []
+    for out in outputs:
+        results.extend(out)
+        if progress is not None:
+            progress(len(results))
+    return results
@@ -0,0 +1,456 @@
+# utils/ingest.py
+import os
+import time
+import uuid
+from collections import namedtuple
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+import numpy as np
+import pandas as pd
+import sqlalchemy as sa
+from config import Config
+from models import db
+from utils.cache import bump_version
+from utils.summaries import refresh_summaries
+
+# How an upload is applied to its table
+INGEST_MODES = ("replace", "upsert")
+
+# One upload column → one model column, coerced with a whole-column `kind`
+Field = namedtuple("Field", ["source", "target", "kind", "required"], defaults=[True])
+
+
+class MissingColumnsError(ValueError):
+    """Raised when an upload lacks the columns its spec requires."""
+
+    def __init__(self, required):
+        self.required = required
+        super().__init__(f"CSV must contain {required}")
+
+
+class InvalidValuesError(ValueError):
+    """Raised when numeric cells of an upload cannot be parsed; nothing is written."""
+
+    def __init__(self, problems):
+        self.problems = problems   # upload column -> 1-based data row numbers
+        detail = "; ".join(
+            f"{column}: {len(rows)} row(s), e.g. row {', '.join(map(str, rows[:5]))}"
+            for column, rows in problems.items()
+        )
+        super().__init__(f"Invalid or missing numeric values ({detail})")
+
+
+# ---------------- Column coercion ----------------
+def _numeric(col):
+    """Numbers from a column: (values, NaN where blank or malformed; mask of malformed cells)."""
+    if pd.api.types.is_numeric_dtype(col):
+        return pd.to_numeric(col), pd.Series(False, index=col.index)
+    text = col.astype("string").str.strip()
+    values = pd.to_numeric(text, errors="coerce")
+    blank = text.isna() | (text == "")
+    return values, values.isna() & ~blank
+
+
+def _typed(values, kind):
+    """int64 / float64, or objects with None for NULLs when any value is missing."""
+    dtype = "int64" if kind == "int" else "float64"
+    if values.notna().all():
+        return values.astype(dtype)
+    return values.astype("Int64" if kind == "int" else dtype).astype(object).where(values.notna(), None)
+
+
+def _text(col, transform=None):
+    """Stringify a column, normalizing each distinct value once instead of once per row."""
+    codes, uniques = pd.factorize(col.astype(str))
+    values = pd.Index(uniques, dtype=object)
+    if transform is not None:
+        values = transform(values.str.strip())
+    return pd.Series(values.take(codes), index=col.index, dtype=object)
+
+
+NUMERIC_KINDS = ("int", "float")   # parsed and validated in TableSpec.transform
+_COERCE = {
+    "str": _text,
+    "title": lambda col: _text(col, lambda v: v.str.title()),
+    "upper": lambda col: _text(col, lambda v: v.str.upper()),
+}
+
+
+class TableSpec:
+    """Maps one upload layout onto one model table."""
+
+    def __init__(self, model, fields, constants=None):
+        self.model = model
+        self.fields = fields
+        self.constants = constants or {}
+
+    @property
+    def required(self):
+        return {f.source for f in self.fields if f.required}
+
+    @property
+    def sources(self):
+        return {f.source for f in self.fields}
+
+    def validate(self, columns):
+        if not self.required.issubset(columns):
+            raise MissingColumnsError(self.required)
+
+    def transform(self, chunk, first_row=0):
+        """
+        Coerce a raw chunk into a frame keyed by model column names. Blank
+        numeric cells become NULL (or the column default when it is not
+        nullable); malformed ones, and blanks in natural-key columns or in a
+        column with neither, raise InvalidValuesError with their row numbers
+        (`first_row` is the number of data rows before this chunk).
+        """
+        self.validate(chunk.columns)
+        columns, problems = {}, {}
+        for f in self.fields:
+            if f.source not in chunk.columns:
+                continue
+            if f.kind not in NUMERIC_KINDS:
+                columns[f.target] = _COERCE[f.kind](chunk[f.source])
+                continue
+            values, bad = _numeric(chunk[f.source])
+            column = self.model.__table__.c[f.target]
+            blank = values.isna() & ~bad
+            key = f.target in getattr(self.model, "natural_key", ())
+            if blank.any() and (key or not column.nullable):
+                default = None if key else _scalar_default(column)
+                if default is None:
+                    bad = bad | blank
+                else:
+                    values = values.fillna(default)
+            if bad.any():
+                problems.setdefault(f.source, []).extend((first_row + np.flatnonzero(bad.to_numpy()) + 1).tolist())
+            columns[f.target] = _typed(values, f.kind)
+        if problems:
+            raise InvalidValuesError(problems)
+        frame = pd.DataFrame(columns, index=chunk.index)
+        for column, value in self.constants.items():
+            frame[column] = value
+        return frame
+
+
+# ---------------- Reading & writing ----------------
+# Upload formats, picked by file extension or content type
+FORMAT_EXTENSIONS = {
+    ".csv": "csv",
+    ".parquet": "parquet",
+    ".pq": "parquet",
+    ".arrow": "arrow",
+    ".arrows": "arrow",
+    ".feather": "arrow",
+    ".ipc": "arrow",
+}
+FORMAT_CONTENT_TYPES = {
+    "text/csv": "csv",
+    "application/vnd.apache.parquet": "parquet",
+    "application/x-parquet": "parquet",
+    "application/vnd.apache.arrow.file": "arrow",
+    "application/vnd.apache.arrow.stream": "arrow",
+}
+
+
+class UnsupportedFormatError(ValueError):
+    """Raised for uploads that are not CSV, Parquet or Arrow IPC."""
+
+
+def detect_format(filename, content_type=None):
+    """Return "csv", "parquet" or "arrow" for an upload, or None if unknown."""
+    ext = os.path.splitext(filename or "")[1].lower()
+    if ext in FORMAT_EXTENSIONS:
+        return FORMAT_EXTENSIONS[ext]
+    return FORMAT_CONTENT_TYPES.get((content_type or "").split(";")[0].strip().lower())
+
+
+def _source(file):
+    """File path, or the underlying stream of a werkzeug FileStorage."""
+    return getattr(file, "stream", file)
+
+
+def _upload_format(file, fmt=None):
+    if fmt:
+        return fmt
+    if isinstance(file, str):
+        return detect_format(file) or "csv"
+    return detect_format(getattr(file, "filename", None), getattr(file, "mimetype", None)) or "csv"
+
+
+def _pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.ipc
+        import pyarrow.parquet
+    except ImportError as e:
+        raise UnsupportedFormatError("pyarrow is required for Parquet / Arrow uploads") from e
+    return pyarrow
+
+
+def _arrow_batches(file, fmt, columns, chunksize):
+    """Open a columnar upload; returns its schema and record batches restricted to `columns`."""
+    pa = _pyarrow()
+    source = _source(file)
+    if fmt == "parquet":
+        parquet = pa.parquet.ParquetFile(source)
+        schema = parquet.schema_arrow
+        wanted = [n for n in schema.names if n.strip() in columns]
+        return schema, parquet.iter_batches(batch_size=chunksize, columns=wanted)
+
+    try:
+        reader = pa.ipc.open_file(source)
+        batches = (reader.get_batch(i) for i in range(reader.num_record_batches))
+    except pa.ArrowInvalid:
+        # Not the random-access file format: read it as an IPC stream
+        if hasattr(source, "seek"):
+            source.seek(0)
+        reader = pa.ipc.open_stream(source)
+        batches = iter(reader)
+    schema = reader.schema
+    wanted = [i for i, n in enumerate(schema.names) if n.strip() in columns]
+    return schema, (batch.select(wanted) for batch in batches)
+
+
+def _columnar_chunks(file, fmt, columns, chunksize):
+    schema, batches = _arrow_batches(file, fmt, columns, chunksize)
+    emitted = False
+    for batch in batches:
+        # Writers choose their own batch sizes; re-slice (zero-copy) to chunksize
+        for offset in range(0, batch.num_rows, chunksize):
+            yield batch.slice(offset, chunksize).to_pandas()
+            emitted = True
+    if not emitted:
+        # Schema-only file: still validate columns like a header-only CSV
+        yield schema.empty_table().to_pandas()
+
+
+def read_chunks(file, spec, chunksize=Config.INGEST_CHUNK_SIZE, fmt=None):
+    """
+    Yield raw upload chunks, reading only the columns `spec` maps.
+    CSV is parsed incrementally; Parquet / Arrow IPC keep their embedded
+    column types and are converted batch by batch without text parsing.
+    """
+    fmt = _upload_format(file, fmt)
+    if fmt == "csv":
+        chunks = pd.read_csv(file, chunksize=chunksize, usecols=lambda c: c.strip() in spec.sources)
+    else:
+        chunks = _columnar_chunks(file, fmt, spec.sources, chunksize)
+    for chunk in chunks:
+        chunk.columns = chunk.columns.str.strip()
+        yield chunk
+
+
+def read_frame(path, fmt=None):
+    """Read a whole upload file (CSV, Parquet or Arrow IPC) into one frame."""
+    fmt = fmt or detect_format(path) or "csv"
+    if fmt == "csv":
+        return pd.read_csv(path)
+    pa = _pyarrow()
+    if fmt == "parquet":
+        return pa.parquet.read_table(path).to_pandas()
+    try:
+        return pa.ipc.open_file(path).read_all().to_pandas()
+    except pa.ArrowInvalid:
+        return pa.ipc.open_stream(path).read_all().to_pandas()
+
+
+def _scalar_default(column):
+    if column.default is not None and column.default.is_scalar:
+        return column.default.arg
+    return None
+
+
+def _column_values(series):
+    # Drivers bind datetime.datetime, not pandas Timestamp
+    if pd.api.types.is_datetime64_any_dtype(series):
+        return list(series.dt.to_pydatetime())
+    return series.tolist()
+
+
+def bulk_insert(table, frame):
+    """Write a whole frame with one executemany INSERT, bypassing ORM/row objects."""
+    if frame.empty:
+        return 0
+    # Core INSERT renders scalar column defaults as parameters; fill them here
+    defaults = {
+        c.key: _scalar_default(c) for c in table.columns
+        if c.key not in frame.columns and _scalar_default(c) is not None
+    }
+    if defaults:
+        frame = frame.assign(**defaults)
+    conn = db.session.connection()
+    stmt = table.insert().compile(dialect=conn.dialect, column_keys=list(frame.columns))
+    if conn.dialect.positional:
+        params = list(zip(*(_column_values(frame[c]) for c in stmt.positiontup)))
+    else:
+        params = frame.to_dict(orient="records")
+    conn.exec_driver_sql(stmt.string, params)
+    return len(frame)
+
+
+def _rss_bytes():
+    """Current resident set size (falls back to the process high-water mark)."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        if resource is None:
+            return 0
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+# ---------------- Staging & swap ----------------
+def create_staging(table):
+    """Create an index-free scratch copy of `table` for one upload to load into."""
+    staging = sa.Table(
+        f"{table.name}_staging_{uuid.uuid4().hex[:8]}",
+        sa.MetaData(),
+        *(
+            sa.Column(c.name, c.type, primary_key=c.primary_key, default=_scalar_default(c))
+            for c in table.columns
+        ),
+    )
+    staging.create(db.session.connection())
+    db.session.commit()
+    return staging
+
+
+def drop_staging(staging):
+    db.session.rollback()
+    staging.drop(db.session.connection(), checkfirst=True)
+    db.session.commit()
+
+
+def swap_in(table, staging):
+    """Replace every row of `table` with the staged rows (caller commits)."""
+    columns = [c.name for c in table.columns]
+    db.session.execute(table.delete())
+    db.session.execute(table.insert().from_select(columns, sa.select(*staging.c)))
+    return {"replaced": True}
+
+
+def merge_in(model, staging, columns):
+    """
+    Upsert staged rows into the model's table by its `natural_key` (caller commits).
+    Rows whose values are unchanged are left alone. Models flagged with
+    `natural_key_groups` replace every row of each uploaded key as a group.
+    """
+    table = model.__table__
+    key = model.natural_key
+    sa.Index(f"ix_{staging.name}_key", *(staging.c[k] for k in key)).create(db.session.connection())
+
+    # Key columns missing from the upload are staged as NULL and match NULL keys
+    matched = sa.and_(*(table.c[k].is_not_distinct_from(staging.c[k]) for k in key))
+    inserted_cols = [c for c in columns if c in table.c]
+    new_rows = sa.select(*(staging.c[c] for c in inserted_cols))
+
+    if getattr(model, "natural_key_groups", False):
+        deleted = db.session.execute(table.delete().where(sa.exists().where(matched))).rowcount
+        inserted = db.session.execute(table.insert().from_select(inserted_cols, new_rows)).rowcount
+        return {"deleted": deleted, "inserted": inserted}
+
+    # Last staged row wins when a key repeats in the upload
+    latest = sa.select(sa.func.max(staging.c.id)).group_by(*(staging.c[k] for k in key))
+    db.session.execute(staging.delete().where(staging.c.id.not_in(latest)))
+    staged = db.session.execute(sa.select(sa.func.count()).select_from(staging)).scalar()
+
+    values = [c for c in inserted_cols if c not in key]
+    updated = 0
+    if values:
+        changed = sa.or_(*(table.c[c].is_distinct_from(staging.c[c]) for c in values))
+        updated = db.session.execute(
+            table.update().values({c: staging.c[c] for c in values}).where(matched, changed)
+        ).rowcount
+    inserted = db.session.execute(
+        table.insert().from_select(
+            inserted_cols,
+            new_rows.where(~sa.exists().where(matched)),
+        )
+    ).rowcount
+    return {"updated": updated, "inserted": inserted, "unchanged": staged - updated - inserted}
+
+
+def ingest(file, spec, mode="replace", chunksize=Config.INGEST_CHUNK_SIZE, fmt=None, progress=None):
+    """
+    Stream an upload into `spec.model`.
+
+    Chunks are loaded into a private staging table (committed per chunk, so
+    the write lock is only held briefly) and applied with one set-based
+    transaction; readers keep seeing the previous dataset until that commit.
+    `mode="replace"` swaps the whole table; `mode="upsert"` merges by the
+    model's natural key and only writes new or changed rows.
+    `file` is an uploaded FileStorage or a path; `fmt` overrides format
+    detection. `progress`, if given, is called with a dict after each chunk.
+    Returns a report with row counts, throughput and peak resident memory
+    (sampled once per chunk, while the chunk is in memory).
+    """
+    if mode not in INGEST_MODES:
+        raise ValueError(f"mode must be one of {INGEST_MODES}")
+    started = time.perf_counter()
+    peak = _rss_bytes()
+
+    table = spec.model.__table__
+    staging = None
+    rows = chunks = 0
+    columns = []
+    try:
+        for chunk in read_chunks(file, spec, chunksize, fmt):
+            frame = spec.transform(chunk, first_row=rows)
+            if staging is None:
+                columns = list(frame.columns)
+                staging = create_staging(table)
+            peak = max(peak, _rss_bytes())
+            rows += bulk_insert(staging, frame)
+            db.session.commit()
+            chunks += 1
+            if progress is not None:
+                elapsed = time.perf_counter() - started
+                progress({
+                    "phase": "loading",
+                    "rows": rows,
+                    "chunks": chunks,
+                    "seconds": round(elapsed, 3),
+                    "rows_per_sec": int(rows / elapsed) if elapsed > 0 else rows,
+                })
+
+        swap_started = time.perf_counter()
+        applied = {}
+        if progress is not None:
+            progress({"phase": "applying", "rows": rows, "chunks": chunks})
+        if staging is not None:
+            if mode == "upsert":
+                applied = merge_in(spec.model, staging, columns)
+            else:
+                applied = swap_in(table, staging)
+            refresh_summaries([table.name])
+            bump_version()
+            db.session.commit()
+        swap_seconds = time.perf_counter() - swap_started
+    except Exception:
+        db.session.rollback()
+        raise
+    finally:
+        if staging is not None:
+            drop_staging(staging)
+
+    seconds = time.perf_counter() - started
+    report = {
+        "table": table.name,
+        "mode": mode,
+        "columns": columns,
+        "rows": rows,
+        "chunks": chunks,
+        "seconds": round(seconds, 3),
+        "swap_seconds": round(swap_seconds, 3),
+        "rows_per_sec": int(rows / seconds) if seconds > 0 else rows,
+        "peak_rss_mb": round(peak / (1024 * 1024), 2),
+        **applied,
+    }
+    print(f"✅ Ingested {rows} rows into {table.name} in {report['seconds']}s "
+          f"({report['rows_per_sec']} rows/s, swap {report['swap_seconds']}s, peak {report['peak_rss_mb']} MB)")
+    return report
@@ -0,0 +1,168 @@
+# utils/jobs.py
+import os
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+from flask import current_app
+from config import Config
+from models import db, Job
+from utils.ingest import detect_format, ingest
+from utils.workers import CancelToken
+from werkzeug.utils import secure_filename
+
+# Background workers per API process (Config.JOB_WORKERS etc.); request workers stay free for dashboards
+_executors = {
+    "default": ThreadPoolExecutor(max_workers=Config.JOB_WORKERS, thread_name_prefix="freshbites-job"),
+    "solver": ThreadPoolExecutor(max_workers=Config.SOLVER_JOB_WORKERS, thread_name_prefix="freshbites-solver"),
+}
+_queue_limits = {"solver": Config.SOLVER_JOB_QUEUE}
+_queued = {name: 0 for name in _executors}   # submitted, not yet finished, per executor
+_queued_lock = threading.Lock()
+
+
+class JobQueueFull(Exception):
+    """Raised by submit when a bounded job queue is at its limit."""
+
+
+def wants_async(req):
+    """True when the client asked for a background job (?async=true)."""
+    return str(req.values.get("async", "")).strip().lower() in ("1", "true", "yes")
+
+
+# ---------------- Job state ----------------
+def update_job(job_id, **fields):
+    """Write job state on its own connection, outside any running job transaction."""
+    fields["updated_at"] = datetime.utcnow()
+    with db.engine.begin() as conn:
+        conn.execute(Job.__table__.update().where(Job.__table__.c.id == job_id).values(**fields))
+
+
+def job_to_dict(job):
+    return {
+        "id": job.id,
+        "kind": job.kind,
+        "status": job.status,
+        "progress": job.progress or {},
+        "result": job.result,
+        "error": job.error,
+        "created_at": job.created_at.isoformat(),
+        "updated_at": job.updated_at.isoformat(),
+    }
+
+
+def get_job(job_id):
+    job = db.session.get(Job, job_id)
+    return job_to_dict(job) if job else None
+
+
+def _job_status(job_id):
+    with db.engine.connect() as conn:
+        return conn.execute(db.select(Job.__table__.c.status).where(Job.__table__.c.id == job_id)).scalar()
+
+
+def cancel_job(job_id):
+    """
+    Ask a job to stop. A queued job is cancelled at once; a running one is
+    marked cancelling and stops at its next check (cancellable jobs only).
+    Any API worker can take the request: the running worker sees it in the DB.
+    Returns the job dict, or None when the job does not exist.
+    """
+    table = Job.__table__
+    with db.engine.begin() as conn:
+        conn.execute(table.update().where(table.c.id == job_id, table.c.status == "queued")
+                     .values(status="cancelled", updated_at=datetime.utcnow()))
+        conn.execute(table.update().where(table.c.id == job_id, table.c.status == "running")
+                     .values(status="cancelling", updated_at=datetime.utcnow()))
+    db.session.expire_all()
+    return get_job(job_id)
+
+
+# ---------------- Running jobs ----------------
+def submit(kind, fn, *args, queue="default", cancellable=False, **kwargs):
+    """
+    Queue `fn(*args, progress=..., **kwargs)` on the `queue` pool ("default"
+    or "solver"). `fn` runs inside an app context and reports progress by
+    calling `progress(dict)`; its return value becomes the job result.
+    A `cancellable` job also gets `cancel=CancelToken()`; if it returns
+    after a cancel, its (partial) result is kept with status "cancelled".
+    Raises JobQueueFull when `queue` is bounded and full.
+    """
+    with _queued_lock:
+        if _queued[queue] >= _queue_limits.get(queue, float("inf")):
+            raise JobQueueFull(f"Too many {queue} jobs queued ({_queued[queue]}); try again later")
+        _queued[queue] += 1
+
+    job_id = uuid.uuid4().hex
+    with db.engine.begin() as conn:
+        conn.execute(Job.__table__.insert().values(
+            id=job_id, kind=kind, status="queued", progress={},
+            created_at=datetime.utcnow(), updated_at=datetime.utcnow(),
+        ))
+    app = current_app._get_current_object()
+    _executors[queue].submit(_run, app, job_id, queue, fn, args, kwargs, cancellable)
+    return job_id
+
+
+def _watch_cancel(app, job_id, token, done):
+    """Poll the job row until `done`; a "cancelling" status trips the token."""
+    with app.app_context():
+        while not done.wait(Config.CANCEL_POLL_SECONDS):
+            if _job_status(job_id) == "cancelling":
+                token.cancel()
+                return
+
+
+def _run(app, job_id, queue, fn, args, kwargs, cancellable):
+    with app.app_context():
+        done = threading.Event()
+        try:
+            table = Job.__table__
+            with db.engine.begin() as conn:
+                started = conn.execute(
+                    table.update().where(table.c.id == job_id, table.c.status == "queued")
+                    .values(status="running", updated_at=datetime.utcnow())
+                ).rowcount
+            if not started:
+                return   # cancelled while queued
+            if cancellable:
+                token = kwargs["cancel"] = CancelToken()
+                threading.Thread(target=_watch_cancel, args=(app, job_id, token, done), daemon=True).start()
+            result = fn(*args, progress=lambda p: update_job(job_id, progress=p), **kwargs)
+            update_job(job_id, status="cancelled" if cancellable and token.cancelled else "done", result=result)
+        except Exception as e:
+            print(f"❌ Job {job_id} failed:", str(e))
+            update_job(job_id, status="failed", error=str(e))
+        finally:
+            done.set()
+            with _queued_lock:
+                _queued[queue] -= 1
+            db.session.remove()
+
+
+def save_upload(file):
+    """Persist an uploaded file so a background job can read it after the request ends."""
+    os.makedirs(Config.JOB_UPLOAD_FOLDER, exist_ok=True)
+    path = os.path.join(Config.JOB_UPLOAD_FOLDER, f"{uuid.uuid4().hex}_{secure_filename(file.filename or 'upload')}")
+    file.save(path)
+    return path
+
+
+def _ingest_saved(path, spec, mode, fmt, progress):
+    try:
+        return ingest(path, spec, mode=mode, fmt=fmt, progress=progress)
+    finally:
+        os.remove(path)
+
+
+def submit_ingest(file, spec, mode="replace"):
+    """Save an upload and ingest it in the background; returns the job id."""
+    fmt = detect_format(file.filename, file.mimetype)
+    path = save_upload(file)
+    return submit(f"ingest:{spec.model.__tablename__}", _ingest_saved, path, spec, mode, fmt)
+
+
+def accepted(job_id):
+    """Standard 202 body for a queued job."""
+    return {"job_id": job_id, "status": "queued", "status_url": f"/api/jobs/{job_id}"}
@@ -0,0 +1,277 @@
+# utils/multi_period.py
+import time
+
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+from ortools.graph.python import min_cost_flow
+from ortools.linear_solver.python import model_builder_helper as mbh
+
+from config import Config
+from models import db, Demand, Production, StockBySkuRegion
+from utils.allocation import LP_SOLVER, solver_parameters
+from utils.network_planner import HIGHS_PARAMETERS
+from utils.optimization_engine import latest_week, plant_lines
+
+PLAN_SOLVER = LP_SOLVER   # fractional inputs only; GLOP beats HiGHS on this staircase LP
+FLOW_TOLERANCE = 1e-6     # LP quantities below this are solver noise
+COST_SCALE = 100          # the flow solver takes integer costs, so costs go in cents
+
+
+# ---------------- Inputs ----------------
+def load_horizon(start_week=None, horizon=None):
+    """
+    Inputs for weeks start_week .. start_week + horizon - 1 (default: from
+    the first demand week, Config.PLAN_HORIZON weeks):
+      lines    — plant × SKU pairs the plants make (latest production week)
+      capacity — plant × week capacity: the plant's rows for that week where
+                 the production table has them, else its latest capacity
+      demand   — SKU × week forecast, summed over regions
+      stock    — opening stock per SKU (stock on hand)
+    """
+    horizon = Config.PLAN_HORIZON if horizon is None else int(horizon)
+    if horizon < 1:
+        raise ValueError("horizon must be at least 1 week")
+    if start_week is None:
+        first_week = db.session.query(db.func.min(Demand.week)).scalar()
+        start_week = 1 if first_week is None else first_week   # week 0 is a valid start
+    weeks = np.arange(start_week, start_week + horizon)
+    first, last = int(weeks[0]), int(weeks[-1])   # plain ints: the DB driver cannot bind numpy ints
+
+    current = latest_week()
+    lines = plant_lines(current)[["Plant", "SKU", "Capacity"]] if current is not None \
+        else pd.DataFrame(columns=["Plant", "SKU", "Capacity"])
+    plants = pd.Index(lines["Plant"].unique())
+    capacity = np.tile(lines.groupby("Plant")["Capacity"].max().reindex(plants).to_numpy(float)[:, None], (1, horizon))
+    planned = db.session.query(Production.plant, Production.week, db.func.max(Production.capacity)) \
+        .filter(Production.week.between(first, last), Production.plant.in_(plants.tolist())) \
+        .group_by(Production.plant, Production.week).all()
+    for plant, week, cap in planned:
+        if cap is not None:
+            capacity[plants.get_loc(plant), week - first] = cap
+
+    demand = pd.DataFrame(
+        db.session.query(Demand.sku, Demand.week, db.func.sum(Demand.forecast))
+        .filter(Demand.week.between(first, last)).group_by(Demand.sku, Demand.week).all(),
+        columns=["SKU", "Week", "Forecast"],
+    )
+    stock = pd.DataFrame(
+        db.session.query(StockBySkuRegion.sku, db.func.sum(StockBySkuRegion.stock))
+        .group_by(StockBySkuRegion.sku).all(),
+        columns=["SKU", "Stock"],
+    )
+    return weeks, lines, pd.DataFrame(capacity, index=plants, columns=weeks), demand, stock
+
+
+# ---------------- Model ----------------
+def build_horizon_model(weeks, lines, capacity, demand, stock, holding_cost, backlog_cost):
+    """
+    Multi-period production LP, built from arrays in one call.
+
+    Variables: x per plant line × week (units produced), I and B per
+    SKU × week (inventory carried out of the week, backlog owed).
+      I[k,t-1] - B[k,t-1] + Σ x over k's lines in t - I[k,t] + B[k,t] = d[k,t]
+      Σ x over a plant's lines in t ≤ capacity[p,t]
+    with I[k,-1] = opening stock and B[k,-1] = 0.
+    Objective: holding_cost·Σ I + backlog_cost·Σ B, per unit-week.
+    Only the nonzero coefficients are generated: each x enters two rows,
+    each I and B two (one in the last week).
+    Returns (model, layout).
+    """
+    T = len(weeks)
+    skus = pd.Index(pd.concat([lines["SKU"], demand["SKU"]]).unique())
+    plants = capacity.index
+    L, K, P = len(lines), len(skus), len(plants)
+    sku_of_line = skus.get_indexer(lines["SKU"])
+    plant_of_line = plants.get_indexer(lines["Plant"])
+
+    d = np.zeros((K, T))
+    np.add.at(d, (skus.get_indexer(demand["SKU"]), demand["Week"].to_numpy(int) - weeks[0]),
+              demand["Forecast"].fillna(0).to_numpy(float))
+    opening = stock.set_index("SKU")["Stock"].reindex(skus).fillna(0).to_numpy(float)
+
+    # Column blocks: x (L×T), I (K×T), B (K×T); row blocks: balance (K×T), capacity (P×T)
+    t = np.arange(T)
+    x = (np.arange(L)[:, None] * T + t).ravel()
+    inv = L * T + (np.arange(K)[:, None] * T + t).ravel()
+    back = L * T + K * T + (np.arange(K)[:, None] * T + t).ravel()
+    x_week = np.tile(t, L)
+    x_balance = np.repeat(sku_of_line, T) * T + x_week
+    x_capacity = K * T + np.repeat(plant_of_line, T) * T + x_week
+    balance = np.arange(K * T)       # row of SKU k, week t = column order of I and B
+    carry = balance % T < T - 1      # I and B of week t also open week t + 1
+
+    rows = [x_balance, x_capacity, balance, balance, balance[carry] + 1, balance[carry] + 1]
+    cols = [x, x, inv, back, inv[carry], back[carry]]
+    vals = [np.ones(L * T), np.ones(L * T), -np.ones(K * T), np.ones(K * T),
+            np.ones(carry.sum()), -np.ones(carry.sum())]
+    rhs = d.copy()
+    rhs[:, 0] -= opening
+    matrix = sp.csr_matrix(
+        (np.concatenate(vals), (np.concatenate(rows), np.concatenate(cols))),
+        shape=(K * T + P * T, L * T + 2 * K * T),
+    )
+
+    model = mbh.ModelBuilderHelper()
+    model.fill_model_from_sparse_data(
+        np.zeros(L * T + 2 * K * T),
+        np.full(L * T + 2 * K * T, np.inf),
+        np.concatenate([np.zeros(L * T), np.full(K * T, float(holding_cost)), np.full(K * T, float(backlog_cost))]),
+        np.concatenate([rhs.ravel(), np.full(P * T, -np.inf)]),
+        np.concatenate([rhs.ravel(), capacity.to_numpy(float).ravel()]),
+        matrix,
+    )
+    return model, {
+        "skus": skus, "demand": d, "opening": opening, "lines": L, "nonzeros": matrix.nnz,
+        "sku_of_line": sku_of_line, "plant_of_line": plant_of_line, "capacity": capacity.to_numpy(float),
+    }
+
+
+def solve_as_flow(layout, holding_cost, backlog_cost):
+    """
+    The horizon LP is a single-commodity min-cost flow, because holding
+    and backlog cost the same for every SKU: a source offers each
+    plant-week its capacity, line arcs turn it into SKU-weeks, and each
+    SKU's weeks are chained by inventory arcs forward (holding cost) and
+    backlog arcs backward (backlog cost). Opening stock is supply at the
+    first week; the last week's leftovers and unused capacity drain to a
+    sink, and its unmet demand is drawn from the source at the backlog
+    cost. Solved exactly by SimpleMinCostFlow, far faster than the LP.
+    Returns the LP variable values (x, I, B), or None when the inputs are
+    not whole units.
+    """
+    d, opening, capacity = layout["demand"], layout["opening"], layout["capacity"]
+    K, T = d.shape
+    P = len(capacity)
+    whole = np.concatenate([d.ravel(), opening, capacity.ravel()])
+    if np.any(whole != np.round(whole)) or np.any(whole < 0):
+        return None
+
+    # Nodes: 0 source, 1 sink, then SKU-weeks and plant-weeks
+    sku_week = 2 + np.arange(K * T).reshape(K, T)
+    plant_week = 2 + K * T + np.arange(P * T).reshape(P, T)
+    line_sku, line_plant = sku_week[layout["sku_of_line"]].ravel(), plant_week[layout["plant_of_line"]].ravel()
+    offered, owed = int(capacity.sum()), int(d.sum())
+    unbounded = offered + owed + int(opening.sum())
+
+    # Arc blocks in LP column order: x (L×T), I (K×T), B (K×T); then capacity and unused capacity
+    source, sink = np.zeros(K, np.int64), np.ones(K, np.int64)
+    tails = [line_plant, np.column_stack([sku_week[:, :-1], sku_week[:, -1]]).ravel(),
+             np.column_stack([sku_week[:, 1:], source]).ravel(), np.zeros(P * T, np.int64), [0]]
+    heads = [line_sku, np.column_stack([sku_week[:, 1:], sink]).ravel(),
+             np.column_stack([sku_week[:, :-1], sku_week[:, -1]]).ravel(), plant_week.ravel(), [1]]
+    capacities = [np.full(len(line_sku) + 2 * K * T, unbounded), capacity.ravel(), [unbounded]]
+    costs = [np.zeros(len(line_sku)), np.full(K * T, holding_cost), np.full(K * T, backlog_cost),
+             np.zeros(P * T + 1)]
+
+    flow = min_cost_flow.SimpleMinCostFlow()
+    arcs = flow.add_arcs_with_capacity_and_unit_cost(
+        np.concatenate(tails).astype(np.int64), np.concatenate(heads).astype(np.int64),
+        np.concatenate(capacities).astype(np.int64),
+        np.rint(np.concatenate(costs) * COST_SCALE).astype(np.int64),
+    )
+    supply = np.zeros(2 + K * T + P * T, np.int64)
+    supply[0], supply[1] = offered + owed, -(offered + int(opening.sum()))
+    supply[sku_week] = -d.astype(np.int64)
+    supply[sku_week[:, 0]] += opening.astype(np.int64)
+    flow.set_nodes_supplies(np.arange(len(supply)), supply)
+    if flow.solve() != flow.OPTIMAL:
+        return None
+    return flow.flows(arcs)[:len(line_sku) + 2 * K * T].astype(float)
+
+
+def solve_horizon(weeks, lines, capacity, demand, stock, holding_cost=None, backlog_cost=None,
+                  solver_name=PLAN_SOLVER, time_limit=None, threads=None, network_first=True):
+    """
+    Plan production over the horizon: as a min-cost flow (solve_as_flow)
+    when the inputs are whole units, else as the LP with `solver_name`.
+    Returns (plan, positions, report):
+    plan rows are {Week, Plant, SKU, Produce}, positions are per SKU × week
+    {Week, SKU, Demand, Produced, Inventory, Backlog}.
+    """
+    started = time.perf_counter()
+    holding_cost = Config.PLAN_HOLDING_COST if holding_cost is None else float(holding_cost)
+    backlog_cost = Config.PLAN_BACKLOG_COST if backlog_cost is None else float(backlog_cost)
+    time_limit = Config.PLAN_TIME_LIMIT if time_limit is None else float(time_limit)
+    if holding_cost < 0 or backlog_cost < 0:
+        raise ValueError("holding_cost and backlog_cost must be non-negative")
+
+    model, layout = build_horizon_model(weeks, lines, capacity, demand, stock, holding_cost, backlog_cost)
+    build_seconds = time.perf_counter() - started
+
+    tick = time.perf_counter()
+    values = solve_as_flow(layout, holding_cost, backlog_cost) if network_first else None
+    if values is not None:
+        status, used = "OPTIMAL", "min_cost_flow"
+        stocks = values[layout["lines"] * len(weeks):].reshape(2, -1).sum(axis=1)
+        objective = holding_cost * stocks[0] + backlog_cost * stocks[1]
+    else:
+        solver = mbh.ModelSolverHelper(solver_name)
+        if time_limit:
+            solver.set_time_limit_in_seconds(max(time_limit, 0.01))
+        params = HIGHS_PARAMETERS if solver_name == "highs" else solver_parameters(solver_name, None, threads)
+        if params:
+            solver.set_solver_specific_parameters(params)
+        solver.solve(model)
+        status, used = solver.status().name, solver_name
+        if solver.has_solution():
+            values, objective = np.asarray(solver.variable_values()), solver.objective_value()
+    solve_seconds = time.perf_counter() - tick
+
+    report = {
+        "status": status,
+        "solver": used,
+        "weeks": len(weeks),
+        "start_week": int(weeks[0]),
+        "lines": layout["lines"],
+        "skus": len(layout["skus"]),
+        "variables": model.num_variables(),
+        "constraints": model.num_constraints(),
+        "nonzeros": layout["nonzeros"],
+        "build_seconds": round(build_seconds, 4),
+        "solve_seconds": round(solve_seconds, 4),
+    }
+    if values is None:
+        return [], [], report
+
+    T, L, skus = len(weeks), layout["lines"], layout["skus"]
+    produce = values[:L * T].reshape(L, T)
+    inventory = values[L * T:L * T + len(skus) * T].reshape(-1, T)
+    backlog = values[L * T + len(skus) * T:].reshape(-1, T)
+
+    line, week = np.nonzero(produce > FLOW_TOLERANCE)
+    plan = pd.DataFrame({
+        "Week": weeks[week],
+        "Plant": lines["Plant"].to_numpy()[line],
+        "SKU": lines["SKU"].to_numpy()[line],
+        "Produce": produce[line, week].round(2),
+    }).sort_values(["Week", "Plant", "SKU"], kind="stable")
+
+    produced = np.zeros((len(skus), T))
+    np.add.at(produced, skus.get_indexer(lines["SKU"]), produce)
+    positions = pd.DataFrame({
+        "Week": np.tile(weeks, len(skus)),
+        "SKU": np.repeat(skus.to_numpy(), T),
+        "Demand": layout["demand"].ravel(),
+        "Produced": produced.ravel().round(2),
+        "Inventory": inventory.ravel().round(2),
+        "Backlog": backlog.ravel().round(2),
+    })
+    positions = positions[(positions[["Demand", "Produced", "Inventory", "Backlog"]] > FLOW_TOLERANCE).any(axis=1)]
+
+    report.update({
+        "objective": round(float(objective), 2),
+        "holding_cost": round(holding_cost * float(inventory.sum()), 2),
+        "backlog_cost": round(backlog_cost * float(backlog.sum()), 2),
+        "demand": float(layout["demand"].sum()),
+        "produced": round(float(produce.sum()), 2),
+        "ending_backlog": round(float(backlog[:, -1].sum()), 2),
+        "seconds": round(time.perf_counter() - started, 4),
+    })
+    return plan.to_dict(orient="records"), positions.to_dict(orient="records"), report
+
+
+def plan_horizon(start_week=None, horizon=None, **options):
+    """Load the horizon from the tables and solve it."""
+    weeks, lines, capacity, demand, stock = load_horizon(start_week, horizon)
+    return solve_horizon(weeks, lines, capacity, demand, stock, **options)
@@ -0,0 +1,252 @@
+# utils/network_planner.py
+import time
+
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+from ortools.graph.python import min_cost_flow
+from ortools.linear_solver.python import model_builder_helper as mbh
+
+from models import db, Demand, StockBySkuRegion, Supplier
+from utils.allocation import solver_parameters
+from utils.optimization_engine import latest_week, plant_lines
+from utils.rebalancing import load_lanes
+
+NETWORK_SOLVER = "highs"        # LP when a plant's capacity binds
+HIGHS_PARAMETERS = "solver=ipm"  # interior point (+ crossover): 2-5x faster than GLOP's simplex here
+FLOW_TOLERANCE = 1e-6            # LP flows below this are solver noise
+COST_SCALE = 100                 # the flow solver takes integer costs, so costs go in cents
+
+
+# ---------------- Inputs ----------------
+def load_network(week=None):
+    """
+    The three tiers from the existing tables, as frames:
+      links — supplier × SKU (Supplier.sku_linked) with unit cost, capacity, lead time
+      lines — plant × SKU the plant makes in `week` (default: latest production week),
+              with the plant's capacity
+      needs — region × SKU forecast for the week less the stock on hand
+    """
+    week = latest_week() if week is None else week
+    links = pd.DataFrame(
+        db.session.query(
+            Supplier.supplier_id, Supplier.sku_linked, Supplier.unit_cost,
+            Supplier.max_capacity, Supplier.lead_time_days,
+        ).filter(Supplier.sku_linked.isnot(None)).all(),
+        columns=["Supplier_ID", "SKU", "Unit_Cost", "Max_Capacity", "Lead_Time_Days"],
+    )
+    lines = plant_lines(week)[["Plant", "SKU", "Capacity"]] if week is not None \
+        else pd.DataFrame(columns=["Plant", "SKU", "Capacity"])
+
+    forecast = pd.DataFrame(
+        db.session.query(Demand.sku, Demand.region, db.func.sum(Demand.forecast))
+        .filter(Demand.week == week).group_by(Demand.sku, Demand.region).all(),
+        columns=["SKU", "Region", "Forecast"],
+    )
+    stock = pd.DataFrame(
+        db.session.query(StockBySkuRegion.sku, StockBySkuRegion.region, StockBySkuRegion.stock).all(),
+        columns=["SKU", "Region", "Stock"],
+    )
+    needs = forecast.merge(stock, on=["SKU", "Region"], how="left").fillna({"Stock": 0})
+    needs = needs.assign(Need=np.maximum(needs["Forecast"].astype(float) - needs["Stock"].astype(float), 0))
+    return week, links, lines, needs.loc[needs["Need"] > 0, ["Region", "SKU", "Need"]].reset_index(drop=True)
+
+
+def freight(origins, destinations, lanes):
+    """Per-unit lane cost for each origin → destination pair; unlisted lanes (or no lane file) cost 0."""
+    if lanes is None or not len(origins):
+        return np.zeros(len(origins))
+    key = pd.MultiIndex.from_arrays([pd.Series(origins, dtype=str).str.strip().str.title(),
+                                     pd.Series(destinations, dtype=str).str.strip().str.title()])
+    table = lanes.drop_duplicates(["From", "To"], keep="last").set_index(["From", "To"])["Cost"]
+    return table.reindex(key).fillna(0).to_numpy(float)
+
+
+# ---------------- Model ----------------
+def build_network_model(links, lines, needs, lanes=None, max_lead_time_days=None):
+    """
+    Least-cost flow over supplier → plant → region, one commodity per SKU,
+    built from arrays in one call. Plant capacity is shared by all the SKUs
+    a plant makes, so this is a multi-commodity flow LP rather than a pure
+    network problem.
+
+    Variables: buy per (supplier link, plant making the SKU), ship per
+    (plant line, region short of the SKU), short per region need.
+      Σ buy over a link's plants ≤ max_capacity
+      Σ buy into a plant line = Σ ship out of it
+      Σ buy into a plant ≤ plant capacity
+      Σ ship into a region need + short = need
+    Objective: (unit cost + freight)·buy + freight·ship + penalty·short, the
+    penalty above any full path cost so demand that can be met always is.
+    Returns (model, layout) with the arc frames needed to read the solution.
+    """
+    if max_lead_time_days is not None:
+        links = links[links["Lead_Time_Days"].fillna(0) <= max_lead_time_days]
+    links = links.reset_index(drop=True).rename_axis("link").reset_index()
+    lines = lines.reset_index(drop=True).rename_axis("line").reset_index()
+    needs = needs.reset_index(drop=True).rename_axis("need").reset_index()
+    plants = pd.Index(lines["Plant"].unique())
+
+    buy = links[["link", "Supplier_ID", "SKU", "Unit_Cost", "Lead_Time_Days"]].merge(
+        lines[["line", "Plant", "SKU"]], on="SKU")
+    ship = lines[["line", "Plant", "SKU"]].merge(needs[["need", "Region", "SKU"]], on="SKU")
+    buy["Unit_Cost"] = buy["Unit_Cost"].fillna(0) + freight(buy["Supplier_ID"], buy["Plant"], lanes)
+    ship["Unit_Cost"] = freight(ship["Plant"], ship["Region"], lanes)
+
+    nb, ns, nn = len(buy), len(ship), len(needs)
+    nl, nj, npl = len(links), len(lines), len(plants)
+    b, s, u = np.arange(nb), nb + np.arange(ns), nb + ns + np.arange(nn)
+    penalty = (buy["Unit_Cost"].max() if nb else 0.0) + (ship["Unit_Cost"].max() if ns else 0.0) + 1.0
+
+    # Rows: link capacities, line balances, plant capacities, region needs
+    line_row, plant_row, need_row = nl, nl + nj, nl + nj + npl
+    plant_of_line = plants.get_indexer(lines["Plant"])
+    rows = [buy["link"], line_row + buy["line"], line_row + ship["line"],
+            plant_row + plant_of_line[buy["line"]], need_row + ship["need"], need_row + np.arange(nn)]
+    cols = [b, b, s, b, s, u]
+    vals = [np.ones(nb), np.ones(nb), -np.ones(ns), np.ones(nb), np.ones(ns), np.ones(nn)]
+    need = needs["Need"].to_numpy(float)
+    plant_capacity = lines.groupby("Plant")["Capacity"].max().reindex(plants).fillna(0).to_numpy(float)
+    row_lower = [np.full(nl, -np.inf), np.zeros(nj), np.full(npl, -np.inf), need]
+    row_upper = [links["Max_Capacity"].fillna(np.inf).to_numpy(float), np.zeros(nj), plant_capacity, need]
+    matrix = sp.csr_matrix(
+        (np.concatenate(vals), (np.concatenate(rows), np.concatenate(cols))),
+        shape=(nl + nj + npl + nn, nb + ns + nn),
+    )
+
+    model = mbh.ModelBuilderHelper()
+    model.fill_model_from_sparse_data(
+        np.zeros(nb + ns + nn),
+        np.full(nb + ns + nn, np.inf),
+        np.concatenate([buy["Unit_Cost"].to_numpy(float), ship["Unit_Cost"].to_numpy(float), np.full(nn, penalty)]),
+        np.concatenate(row_lower),
+        np.concatenate(row_upper),
+        matrix,
+    )
+    nodes = links["Supplier_ID"].nunique() + npl + needs["Region"].nunique()
+    return model, {
+        "buy": buy, "ship": ship, "needs": needs, "nodes": int(nodes), "penalty": penalty,
+        "link_capacity": row_upper[0], "plant_capacity": plant_capacity, "plant_of_line": plant_of_line,
+    }
+
+
+def solve_as_flow(layout):
+    """
+    The same model without the plant capacity rows is a pure min-cost flow:
+    a source feeds every supplier link (up to its capacity) and every region
+    need directly at the shortfall penalty. SKUs only meet at the source, so
+    one SimpleMinCostFlow solves them all. Returns the LP variable values
+    (buy, ship, short) when the flow also fits every plant's capacity, and
+    so is optimal for the full model; None when a plant binds or the inputs
+    are not whole units.
+    """
+    buy, ship, needs = layout["buy"], layout["ship"], layout["needs"]
+    need = needs["Need"].to_numpy(float)
+    link_capacity = np.minimum(layout["link_capacity"], need.sum())
+    costs = np.concatenate([buy["Unit_Cost"].to_numpy(float), ship["Unit_Cost"].to_numpy(float), [layout["penalty"]]])
+    whole = np.concatenate([need, link_capacity])
+    if not len(need) or np.any(whole != np.round(whole)):
+        return None
+
+    # Nodes: 0 = source, then links, plant lines, region needs
+    nl, nj, nn = len(link_capacity), len(layout["plant_of_line"]), len(need)
+    link_node, line_node, need_node = 1 + np.arange(nl), 1 + nl + np.arange(nj), 1 + nl + nj + np.arange(nn)
+    unbounded = np.int64(need.sum())
+    tails = np.concatenate([np.zeros(nl, np.int64), link_node[buy["link"]], line_node[ship["line"]], np.zeros(nn, np.int64)])
+    heads = np.concatenate([link_node, line_node[buy["line"]], need_node[ship["need"]], need_node])
+    capacities = np.concatenate([link_capacity, np.full(len(buy) + len(ship), unbounded), need]).astype(np.int64)
+    unit = np.concatenate([np.zeros(nl), costs[:len(buy) + len(ship)], np.full(nn, costs[-1])])
+
+    flow = min_cost_flow.SimpleMinCostFlow()
+    arcs = flow.add_arcs_with_capacity_and_unit_cost(tails, heads, capacities, np.rint(unit * COST_SCALE).astype(np.int64))
+    flow.set_nodes_supplies(np.concatenate([[0], need_node]), np.concatenate([[need.sum()], -need]).astype(np.int64))
+    if flow.solve() != flow.OPTIMAL:
+        return None
+
+    sent = flow.flows(arcs).astype(float)
+    bought = sent[nl:nl + len(buy)]
+    load = np.bincount(layout["plant_of_line"][buy["line"]], weights=bought, minlength=len(layout["plant_capacity"]))
+    if np.any(load > layout["plant_capacity"]):
+        return None
+    return sent[nl:]
+
+
+def solve_network(links, lines, needs, lanes=None, max_lead_time_days=None,
+                  solver_name=NETWORK_SOLVER, time_limit=None, threads=None, network_first=True):
+    """
+    Plan flows through the supplier → plant → region network at least cost:
+    as a min-cost flow when no plant's capacity binds (solve_as_flow), else
+    as the LP with `solver_name`. Returns (flows, shortfall, report): flows are {Tier, SKU, From, To,
+    Quantity, Unit_Cost, Total_Cost}, shortfall is {SKU, Region, Shortfall}.
+    """
+    started = time.perf_counter()
+    model, layout = build_network_model(links, lines, needs, lanes, max_lead_time_days)
+    build_seconds = time.perf_counter() - started
+
+    tick = time.perf_counter()
+    values = solve_as_flow(layout) if network_first else None
+    if values is not None:
+        status, used = "OPTIMAL", "min_cost_flow"
+    else:
+        solver = mbh.ModelSolverHelper(solver_name)
+        if time_limit:
+            solver.set_time_limit_in_seconds(max(float(time_limit), 0.01))
+        params = HIGHS_PARAMETERS if solver_name == "highs" else solver_parameters(solver_name, None, threads)
+        if params:
+            solver.set_solver_specific_parameters(params)
+        solver.solve(model)
+        status, used = solver.status().name, solver_name
+        if solver.has_solution():
+            values = np.asarray(solver.variable_values())
+    solve_seconds = time.perf_counter() - tick
+
+    buy, ship, needs = layout["buy"], layout["ship"], layout["needs"]
+    report = {
+        "status": status,
+        "solver": used,
+        "nodes": layout["nodes"],
+        "arcs": len(buy) + len(ship),
+        "variables": model.num_variables(),
+        "constraints": model.num_constraints(),
+        "build_seconds": round(build_seconds, 4),
+        "solve_seconds": round(solve_seconds, 4),
+    }
+    if values is None:
+        return [], [], report
+
+    buy = buy.assign(Quantity=values[:len(buy)])
+    ship = ship.assign(Quantity=values[len(buy):len(buy) + len(ship)])
+    short = needs.assign(Shortfall=values[len(buy) + len(ship):])
+
+    flows = pd.concat([
+        buy.assign(Tier="supplier→plant", From=buy["Supplier_ID"], To=buy["Plant"]),
+        ship.assign(Tier="plant→region", From=ship["Plant"], To=ship["Region"]),
+    ], ignore_index=True)
+    flows = flows[flows["Quantity"] > FLOW_TOLERANCE]
+    flows = flows.assign(Quantity=flows["Quantity"].round(2),
+                         Total_Cost=(flows["Quantity"] * flows["Unit_Cost"]).round(2))
+    short = short[short["Shortfall"] > FLOW_TOLERANCE].assign(Shortfall=lambda d: d["Shortfall"].round(2))
+
+    demand = float(needs["Need"].sum())
+    unmet = float(short["Shortfall"].sum())
+    report.update({
+        "total_cost": round(float(flows["Total_Cost"].sum()), 2),
+        "purchase_cost": round(float(flows.loc[flows["Tier"] == "supplier→plant", "Total_Cost"].sum()), 2),
+        "demand": demand,
+        "delivered": round(demand - unmet, 2),
+        "shortfall": round(unmet, 2),
+        "seconds": round(time.perf_counter() - started, 4),
+    })
+    columns = ["Tier", "SKU", "From", "To", "Quantity", "Unit_Cost", "Total_Cost"]
+    return (flows[columns].to_dict(orient="records"),
+            short[["SKU", "Region", "Shortfall"]].to_dict(orient="records"),
+            report)
+
+
+def plan_network(week=None, max_lead_time_days=None, solver_name=NETWORK_SOLVER, time_limit=None):
+    """Load the network from the tables (lanes from REGION_LANES_PATH) and solve it."""
+    week, links, lines, needs = load_network(week)
+    flows, shortfall, report = solve_network(links, lines, needs, load_lanes(), max_lead_time_days,
+                                             solver_name, time_limit)
+    report["week"] = week
+    return flows, shortfall, report
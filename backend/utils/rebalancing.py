@@ -0,0 +1,257 @@
+# utils/rebalancing.py
+import os
+
+import numpy as np
+import pandas as pd
+from ortools.graph.python import min_cost_flow
+
+from config import Config
+from models import db, DemandBySkuRegion, StockBySkuRegion
+
+SURPLUS_FACTOR = 1.3        # stock above forecast × this is surplus (as in /inventory_predictor)
+BATCH_ARCS = 1_000_000      # lanes per min-cost-flow solve; whole SKUs are packed up to this
+COST_SCALE = 100            # the flow solver takes integer costs, so lane costs go in cents
+
+_lanes = {}   # path -> (mtime, frame)
+
+
+# ---------------- Inputs ----------------
+def load_positions():
+    """Forecast vs stock per SKU × Region (outer join, missing = 0), or None."""
+    demand = db.session.query(
+        DemandBySkuRegion.sku, DemandBySkuRegion.region, DemandBySkuRegion.forecast
+    ).order_by(DemandBySkuRegion.sku, DemandBySkuRegion.region).all()
+    inventory = db.session.query(
+        StockBySkuRegion.sku, StockBySkuRegion.region, StockBySkuRegion.stock
+    ).order_by(StockBySkuRegion.sku, StockBySkuRegion.region).all()
+    if not demand or not inventory:
+        return None
+
+    demand_df = pd.DataFrame(demand, columns=["SKU", "Region", "Forecast"])
+    inv_df = pd.DataFrame(inventory, columns=["SKU", "Region", "Stock"])
+    return pd.merge(demand_df, inv_df, on=["SKU", "Region"], how="outer").fillna(0)
+
+
+def load_lanes(path=None):
+    """
+    Region-to-region lanes from a CSV with columns From, To, Cost (per unit)
+    and optionally Lead_Time (weeks). Re-read only when the file changes;
+    None when no lane file is configured.
+    """
+    path = path or Config.REGION_LANES_PATH
+    if not path or not os.path.exists(path):
+        return None
+    mtime = os.path.getmtime(path)
+    cached = _lanes.get(path)
+    if cached and cached[0] == mtime:
+        return cached[1]
+
+    lanes = pd.read_csv(path)
+    missing = {"From", "To", "Cost"} - set(lanes.columns)
+    if missing:
+        raise ValueError(f"Lane file must contain {sorted(missing)}")
+    lanes = lanes.assign(From=lanes["From"].astype(str).str.strip().str.title(),
+                         To=lanes["To"].astype(str).str.strip().str.title())
+    _lanes[path] = (mtime, lanes)
+    return lanes
+
+
+def lanes_stamp(path=None):
+    """Path and mtime of the lane file ("" when none), for response cache keys."""
+    path = path or Config.REGION_LANES_PATH
+    if not path or not os.path.exists(path):
+        return ""
+    return f"{path}@{os.path.getmtime(path)}"
+
+
+def positions(merged):
+    """
+    Split SKU × Region rows into sources (units they can give) and sinks
+    (units they are short). Sources are surplus regions; a SKU that is short
+    somewhere but has no surplus region draws on any region stocked above
+    its forecast. No region gives below its own forecast.
+    """
+    stock, forecast = merged["Stock"].to_numpy(float), merged["Forecast"].to_numpy(float)
+    need = np.floor(np.maximum(forecast - stock, 0))
+    excess = np.floor(np.maximum(stock - forecast, 0))
+
+    surplus = stock > forecast * SURPLUS_FACTOR
+    fallback = _sku_has(merged, need > 0) & ~_sku_has(merged, surplus)
+    give = np.where(surplus | fallback, excess, 0)
+
+    sources = merged.loc[give > 0, ["SKU", "Region"]].assign(Quantity=give[give > 0])
+    sinks = merged.loc[need > 0, ["SKU", "Region"]].assign(Quantity=need[need > 0])
+    return sources, sinks
+
+
+def _sku_has(merged, flag):
+    """Per row: does any row of the same SKU have `flag`."""
+    codes = pd.factorize(merged["SKU"])[0]
+    return np.bincount(codes, flag)[codes] > 0
+
+
+def _by_sku(frame, skus):
+    """Rows sorted by SKU code, with the code column and each row's offset within its SKU."""
+    frame = frame.assign(code=skus.get_indexer(frame["SKU"])).sort_values("code", kind="stable")
+    return frame.assign(before=frame.groupby("code")["Quantity"].cumsum() - frame["Quantity"]).reset_index(drop=True)
+
+
+# ---------------- Matching ----------------
+def match_uniform(sources, sinks):
+    """
+    Transfers when every lane costs the same. Any maximal matching is then
+    optimal, so each SKU's sources and sinks are laid end to end on a shared
+    axis and the transfers read off where the intervals overlap. Linear in
+    rows, all SKUs at once.
+    """
+    skus = pd.Index(pd.concat([sources["SKU"], sinks["SKU"]]).unique())
+    src, snk = _by_sku(sources, skus), _by_sku(sinks, skus)
+
+    # One block per SKU, wide enough for either side
+    block = np.maximum(np.bincount(src["code"], src["Quantity"], len(skus)),
+                       np.bincount(snk["code"], snk["Quantity"], len(skus)))
+    start = np.concatenate(([0.0], np.cumsum(block)[:-1]))
+    src_lo = start[src["code"]] + src["before"].to_numpy()
+    snk_lo = start[snk["code"]] + snk["before"].to_numpy()
+    src_hi, snk_hi = src_lo + src["Quantity"].to_numpy(), snk_lo + snk["Quantity"].to_numpy()
+
+    cuts = np.unique(np.concatenate((src_lo, src_hi, snk_lo, snk_hi)))
+    mid, width = (cuts[:-1] + cuts[1:]) / 2, np.diff(cuts)
+    i = np.minimum(np.searchsorted(src_hi, mid, side="right"), len(src) - 1)
+    j = np.minimum(np.searchsorted(snk_hi, mid, side="right"), len(snk) - 1)
+    both = (src_lo[i] <= mid) & (mid < src_hi[i]) & (snk_lo[j] <= mid) & (mid < snk_hi[j])
+
+    return pd.DataFrame({
+        "SKU": src["SKU"].to_numpy()[i[both]],
+        "From": src["Region"].to_numpy()[i[both]],
+        "To": snk["Region"].to_numpy()[j[both]],
+        "Quantity": width[both],
+    })
+
+
+def lane_matrix(regions, lanes, max_lead_time=None):
+    """
+    Dense region × region unit cost and lead time. Unlisted lanes cost more
+    than any listed one (usable, but last); lanes slower than max_lead_time
+    are closed (inf).
+    """
+    n = len(regions)
+    cost = np.full((n, n), float(lanes["Cost"].max()) + 1)
+    lead = np.full((n, n), np.nan)
+    a, b = regions.get_indexer(lanes["From"]), regions.get_indexer(lanes["To"])
+    cost[a, b] = lanes["Cost"].to_numpy(float)
+    if "Lead_Time" in lanes.columns:
+        lead[a, b] = lanes["Lead_Time"].to_numpy(float)
+        if max_lead_time is not None:
+            cost[lead > max_lead_time] = np.inf
+    return cost, lead
+
+
+def match_lanes(sources, sinks, lanes, max_lead_time=None):
+    """
+    Least-cost transfers over the lane matrix: a transportation problem per
+    SKU, solved as one min-cost max-flow over many SKUs at a time (each SKU
+    is its own component of the graph). Sources give at most their excess
+    and sinks take at most their shortfall.
+    """
+    skus = pd.Index(pd.concat([sources["SKU"], sinks["SKU"]]).unique())
+    regions = pd.Index(pd.concat([sources["Region"], sinks["Region"], lanes["From"], lanes["To"]]).unique())
+    cost, lead = lane_matrix(regions, lanes, max_lead_time)
+    src, snk = _by_sku(sources, skus), _by_sku(sinks, skus)
+    src_code, snk_code = src["code"].to_numpy(), snk["code"].to_numpy()
+    src_region, snk_region = regions.get_indexer(src["Region"]), regions.get_indexer(snk["Region"])
+    src_qty, snk_qty = src["Quantity"].to_numpy(np.int64), snk["Quantity"].to_numpy(np.int64)
+
+    n_src = np.bincount(src_code, minlength=len(skus))
+    n_snk = np.bincount(snk_code, minlength=len(skus))
+    first_src = np.concatenate(([0], np.cumsum(n_src)[:-1]))
+    first_snk = np.concatenate(([0], np.cumsum(n_snk)[:-1]))
+    arcs = n_src * n_snk
+    batch = (np.cumsum(arcs) - arcs) // BATCH_ARCS
+
+    moves = []
+    for b in np.unique(batch):
+        in_batch = np.flatnonzero(batch == b)
+        lo_s, hi_s = first_src[in_batch[0]], first_src[in_batch[-1]] + n_src[in_batch[-1]]
+        lo_d, hi_d = first_snk[in_batch[0]], first_snk[in_batch[-1]] + n_snk[in_batch[-1]]
+        if hi_s == lo_s or hi_d == lo_d:
+            continue
+
+        # Every source × sink pair of the same SKU
+        reps = n_snk[src_code[lo_s:hi_s]]
+        tails = np.repeat(np.arange(lo_s, hi_s), reps)
+        offset = np.arange(reps.sum()) - np.repeat(np.cumsum(reps) - reps, reps)
+        heads = first_snk[src_code[tails]] + offset
+        unit = cost[src_region[tails], snk_region[heads]]
+        open_ = np.isfinite(unit)
+        tails, heads, unit = tails[open_], heads[open_], unit[open_]
+        if not len(tails):
+            continue
+
+        # Node ids: sources first, then sinks, local to the batch
+        n_s = hi_s - lo_s
+        flow = min_cost_flow.SimpleMinCostFlow()
+        arc_ids = flow.add_arcs_with_capacity_and_unit_cost(
+            tails - lo_s, heads - lo_d + n_s,
+            np.minimum(src_qty[tails], snk_qty[heads]),
+            np.rint(unit * COST_SCALE).astype(np.int64),
+        )
+        flow.set_nodes_supplies(np.arange(n_s + hi_d - lo_d),
+                                np.concatenate((src_qty[lo_s:hi_s], -snk_qty[lo_d:hi_d])))
+        status = flow.solve_max_flow_with_min_cost()
+        if status != flow.OPTIMAL:
+            raise RuntimeError(f"Rebalancing flow failed with status {status}")
+
+        sent = flow.flows(arc_ids)
+        used = sent > 0
+        t, h = tails[used], heads[used]
+        moves.append(pd.DataFrame({
+            "SKU": src["SKU"].to_numpy()[t],
+            "From": src["Region"].to_numpy()[t],
+            "To": snk["Region"].to_numpy()[h],
+            "Quantity": sent[used],
+            "Unit_Cost": unit[used],
+            "Lead_Time": lead[src_region[t], snk_region[h]],
+        }))
+
+    if not moves:
+        return pd.DataFrame(columns=["SKU", "From", "To", "Quantity", "Unit_Cost", "Lead_Time"])
+    return pd.concat(moves, ignore_index=True)
+
+
+def surplus_moves(merged):
+    """SKUs with surplus but no shortage: send each surplus to the SKU's lowest-stock region."""
+    stock, forecast = merged["Stock"].to_numpy(float), merged["Forecast"].to_numpy(float)
+    surplus = stock > forecast * SURPLUS_FACTOR
+    pushing = _sku_has(merged, surplus) & ~_sku_has(merged, stock < forecast)
+    rows = merged[surplus & pushing]
+    if rows.empty:
+        return pd.DataFrame(columns=["SKU", "From", "To", "Quantity"])
+
+    candidates = merged[pushing]
+    receiver = candidates.loc[candidates.groupby("SKU")["Stock"].idxmin(), ["SKU", "Region"]]
+    moves = rows.merge(receiver.rename(columns={"Region": "To"}), on="SKU")
+    moves = moves.assign(From=moves["Region"], Quantity=np.floor(moves["Stock"] - moves["Forecast"]))
+    return moves.loc[(moves["From"] != moves["To"]) & (moves["Quantity"] > 0), ["SKU", "From", "To", "Quantity"]]
+
+
+# ---------------- Plan ----------------
+def plan_transfers(merged, lanes=None, max_lead_time=None):
+    """
+    Transfer suggestions {SKU, From, To, Quantity}, plus Unit_Cost and
+    Lead_Time when a lane matrix is given. Shortages are filled from
+    surplus at least cost (or in any order when lanes are uniform); SKUs
+    with surplus and no shortage push it to their lowest-stock region.
+    """
+    sources, sinks = positions(merged)
+    if sources.empty or sinks.empty:
+        moves = pd.DataFrame(columns=["SKU", "From", "To", "Quantity"])
+    elif lanes is None:
+        moves = match_uniform(sources, sinks)
+    else:
+        moves = match_lanes(sources, sinks, lanes, max_lead_time)
+
+    moves = pd.concat([moves, surplus_moves(merged)], ignore_index=True)
+    moves = moves[moves["Quantity"] > 0].sort_values(["SKU", "To", "From"], kind="stable")
+    moves["Quantity"] = moves["Quantity"].astype(int)
+    return moves
@@ -0,0 +1,310 @@
+# utils/sourcing.py
+import time
+
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+from ortools.linear_solver.python import model_builder_helper as mbh
+
+from config import Config
+from models import db, DemandBySku, Supplier
+from utils.allocation import LP_SOLVER, MIP_SOLVER, solver_parameters
+
+CHUNK_SOLVER = "sat"        # CP-SAT: fastest on the small independent MOQ models
+SOURCING_CHUNK_SKUS = 250   # SKUs per independent solve when capacity does not bind
+
+
+def load_sourcing_data():
+    """
+    SKU demand (from the demand_by_sku summary) and every supplier × SKU
+    link for those SKUs, read through the sku_linked index and matched in
+    one merge rather than a scan of all suppliers per SKU.
+    """
+    demand = pd.DataFrame(
+        db.session.query(DemandBySku.sku, DemandBySku.forecast).order_by(DemandBySku.sku).all(),
+        columns=["SKU", "Forecast"],
+    )
+    links = pd.DataFrame(
+        db.session.query(
+            Supplier.sku_linked, Supplier.supplier_id, Supplier.name,
+            Supplier.unit_cost, Supplier.min_order_qty, Supplier.max_capacity,
+        ).filter(Supplier.sku_linked.isnot(None)).order_by(Supplier.sku_linked).all(),
+        columns=["SKU", "Supplier_ID", "Supplier_Name", "Unit_Cost", "MOQ", "Max_Capacity"],
+    )
+    links = links[links["SKU"].isin(demand["SKU"])].reset_index(drop=True)
+    return demand, links
+
+
+def link_arrays(demand, links):
+    """(forecast per SKU, SKU index, unit cost, MOQ, usable upper bound) per link."""
+    forecast = np.maximum(demand["Forecast"].fillna(0).to_numpy(dtype=np.float64), 0)
+    sku_of = pd.Index(demand["SKU"]).get_indexer(links["SKU"])
+    cost = links["Unit_Cost"].fillna(0).to_numpy(dtype=np.float64)
+    moq = links["MOQ"].fillna(0).to_numpy(dtype=np.float64)
+    upper = np.minimum(links["Max_Capacity"].fillna(np.inf).to_numpy(dtype=np.float64), forecast[sku_of])
+    upper = np.maximum(upper, 0)
+    upper[moq > upper] = 0   # the MOQ alone would overshoot demand or capacity: unusable link
+    return forecast, sku_of, cost, moq, upper
+
+
+def shortfall_penalty(cost):
+    return (cost.max() if len(cost) else 0.0) + 1.0
+
+
+def greedy_plan(forecast, sku_of, cost, moq, upper, total_capacity):
+    """
+    Lower bound and a feasible plan for the capacity-bound case, without
+    a solver. Ignoring MOQs, buying the cheapest units first (each SKU
+    capped by its forecast, all by the total) is an optimal LP solution,
+    because the SKU caps nest inside the total cap; its objective bounds
+    the MIP from below. The plan makes the same pass but skips any link
+    whose remaining room is below its MOQ.
+    Returns (bound, plan quantities per link).
+    """
+    order = np.argsort(cost, kind="stable")
+    # LP: per-SKU take in cost order, then the total cut over all links in cost order
+    sku_sorted = sku_of[order]
+    by_sku = np.lexsort((np.arange(len(order)), sku_sorted))          # cost order within each SKU
+    taken_before = np.cumsum(upper[order][by_sku]) - upper[order][by_sku]
+    first = np.r_[0, np.flatnonzero(np.diff(sku_sorted[by_sku])) + 1]
+    offset = np.repeat(taken_before[first], np.diff(np.r_[first, len(by_sku)]))
+    take = np.empty(len(order))
+    take[by_sku] = np.clip(forecast[sku_sorted[by_sku]] - (taken_before - offset), 0, upper[order][by_sku])
+    before = np.cumsum(take) - take
+    take = np.clip(total_capacity - before, 0, take)
+    lp = np.zeros(len(order))
+    lp[order] = take
+    penalty = shortfall_penalty(cost)
+    bound = cost @ lp + penalty * (forecast.sum() - lp.sum())
+
+    plan = np.zeros(len(order))
+    room, left = forecast.copy(), float(total_capacity)
+    for index in order:
+        amount = np.floor(min(upper[index], room[sku_of[index]], left))
+        if amount <= 0 or amount < moq[index]:
+            continue
+        plan[index] = amount
+        room[sku_of[index]] -= amount
+        left -= amount
+    return bound, plan
+
+
+def build_sourcing_model(demand, links, total_capacity=None, relax=False):
+    """
+    Cost-minimizing sourcing MIP, built from arrays in one call. `links`
+    must be sorted by SKU in `demand` order.
+
+    Variables: x per link (units bought), y per link with a MOQ (1 if the
+    link is used at all), s per SKU (demand left unmet).
+      Σ x over a SKU's links + s = forecast      (never buys above demand)
+      MOQ·y ≤ x ≤ max_capacity·y                 (links with a MOQ)
+      Σ x ≤ total_capacity                       (left out when None)
+    Objective: Σ unit_cost·x + penalty·Σ s. The penalty is above every unit
+    cost, so a unit that can be bought is never left short to save its own
+    cost; MOQs can still make a few short units cheaper than a costlier
+    supplier mix that would cover them.
+    Returns (model, layout) where layout holds the per-link arrays.
+    """
+    forecast, sku_of, cost, moq, upper = link_arrays(demand, links)
+    n, k = len(links), len(demand)
+    gated = np.flatnonzero((moq > 0) & (upper > 0))   # links that need a y
+    m = len(gated)
+    x, y, s = np.arange(n), n + np.arange(m), n + m + np.arange(k)
+    penalty = shortfall_penalty(cost)
+
+    # Rows: k demand balances, m upper gates, m MOQ gates, then the total capacity
+    gate_up, gate_moq = k + np.arange(m), k + m + np.arange(m)
+    rows = [sku_of, np.arange(k), gate_up, gate_up, gate_moq, gate_moq]
+    cols = [x, s, x[gated], y, x[gated], y]
+    vals = [np.ones(n), np.ones(k), np.ones(m), -upper[gated], np.ones(m), -moq[gated]]
+    row_lower = [forecast, np.full(m, -np.inf), np.zeros(m)]
+    row_upper = [forecast, np.zeros(m), np.full(m, np.inf)]
+    if total_capacity is not None:
+        rows.append(np.full(n, k + 2 * m))
+        cols.append(x)
+        vals.append(np.ones(n))
+        row_lower.append([-np.inf])
+        row_upper.append([max(float(total_capacity), 0.0)])
+    matrix = sp.csr_matrix(
+        (np.concatenate(vals), (np.concatenate(rows), np.concatenate(cols))),
+        shape=(k + 2 * m + (total_capacity is not None), n + m + k),
+    )
+
+    model = mbh.ModelBuilderHelper()
+    model.fill_model_from_sparse_data(
+        np.zeros(n + m + k),
+        np.concatenate([upper, np.ones(m), forecast]),
+        np.concatenate([cost, np.zeros(m), np.full(k, penalty)]),
+        np.concatenate(row_lower),
+        np.concatenate(row_upper),
+        matrix,
+    )
+    if not relax:
+        # s is integral too where the forecast is, so CP-SAT can take the model
+        integral = np.concatenate([x, y, s[forecast == np.round(forecast)]])
+        for index in integral:
+            model.set_var_integrality(int(index), True)
+    return model, {"links": n, "gated_links": gated, "skus": k, "forecast": forecast, "sku_of": sku_of}
+
+
+def _run_solver(model, solver_name, time_limit, gap, threads):
+    solver = mbh.ModelSolverHelper(solver_name)
+    if time_limit:
+        solver.set_time_limit_in_seconds(max(float(time_limit), 0.01))
+    params = solver_parameters(solver_name, gap, threads)
+    if params:
+        solver.set_solver_specific_parameters(params)
+    solver.solve(model)
+    return solver
+
+
+def _hint(model, layout, plan):
+    """Seed the MIP with a plan: x, then y = used, then s = unmet demand."""
+    n, gated = layout["links"], layout["gated_links"]
+    for index, value in enumerate(plan):
+        model.add_hint(index, float(value))
+    for offset, link in enumerate(gated):
+        model.add_hint(n + offset, 1.0 if plan[link] > 0 else 0.0)
+    unmet = layout["forecast"] - np.bincount(layout["sku_of"], weights=plan, minlength=layout["skus"])
+    for offset, value in enumerate(unmet):
+        model.add_hint(n + len(gated) + offset, float(value))
+
+
+def solve_sourcing(demand, links, total_capacity, relax=False, time_limit=None, gap=None, threads=None):
+    """
+    Allocate SKU demand to suppliers at least cost. Returns (rows, report);
+    rows keep the /optimize_production shape, one per link that buys.
+
+    When the total capacity cannot bind (it covers every SKU's reachable
+    demand) the SKUs are independent: the capacity row is dropped and
+    chunks of SOURCING_CHUNK_SKUS SKUs are solved exactly with CP-SAT,
+    which handles these small MOQ models far faster than one large solve.
+    Each chunk gets an even share of the time left; a chunk that runs out
+    of time is filled by greedy_plan and the plan reported FEASIBLE.
+
+    When it binds, greedy_plan gives an exact LP bound and a feasible plan
+    in one pass; if that plan is within `gap` (Config.SOURCING_GAP by
+    default) it is the answer (FEASIBLE, or OPTIMAL at a zero gap),
+    otherwise it seeds one SCIP model over all SKUs, run for at most
+    `time_limit` seconds.
+    """
+    started = time.perf_counter()
+    demand = demand.reset_index(drop=True)
+    links = links.assign(_sku=pd.Index(demand["SKU"]).get_indexer(links["SKU"])) \
+        .sort_values("_sku", kind="stable").drop(columns="_sku").reset_index(drop=True)
+    time_limit = Config.SOURCING_TIME_LIMIT if time_limit is None else time_limit
+    gap = Config.SOURCING_GAP if gap is None else gap
+
+    forecast, sku_of, cost, moq, upper = link_arrays(demand, links)
+    penalty = shortfall_penalty(cost)
+    binding = float(total_capacity) < np.minimum(forecast, np.bincount(sku_of, weights=upper, minlength=len(demand))).sum()
+
+    quantity, objective, bound = None, None, None
+    statuses, solver_name = [], None
+    build_seconds = solve_seconds = 0.0
+    variables = constraints = 0
+    chunks = []
+    if binding and not relax:
+        tick = time.perf_counter()
+        bound, plan = greedy_plan(forecast, sku_of, cost, moq, upper, total_capacity)
+        solve_seconds += time.perf_counter() - tick
+        quantity, objective = plan, cost @ plan + penalty * (forecast.sum() - plan.sum())
+        # Within the gap is good enough to stop, but only a zero gap proves it optimal
+        within = (objective - bound) / max(abs(objective), 1e-9)
+        solver_name, statuses = "greedy", ["OPTIMAL" if within <= 1e-9 else "FEASIBLE"]
+        if within > gap:
+            solver_name, chunks = MIP_SOLVER, [(0, len(demand))]
+    elif relax:
+        solver_name, chunks = LP_SOLVER, [(0, len(demand))]
+    else:
+        solver_name = CHUNK_SOLVER
+        bounds = list(range(0, len(demand), SOURCING_CHUNK_SKUS)) + [len(demand)]
+        chunks = list(zip(bounds[:-1], bounds[1:]))
+
+    greedy_chunks = 0
+    if chunks:
+        link_bounds = np.searchsorted(sku_of, [a for a, _ in chunks] + [len(demand)])
+        seed, seed_objective, seed_bound = quantity, objective, bound
+        quantity, objective, bound, statuses = np.zeros(len(links)), 0.0, 0.0, []
+        deadline = time.perf_counter() + time_limit if time_limit else None
+        for index, (first, last) in enumerate(chunks):
+            part = slice(link_bounds[index], link_bounds[index + 1])
+            tick = time.perf_counter()
+            model, layout = build_sourcing_model(
+                demand.iloc[first:last], links.iloc[part], total_capacity if binding else None, relax
+            )
+            if seed is not None:
+                _hint(model, layout, seed[part])
+            build_seconds += time.perf_counter() - tick
+            variables += model.num_variables()
+            constraints += model.num_constraints()
+
+            # Each chunk gets an even share of what is left, so one slow chunk cannot use it all
+            tick = time.perf_counter()
+            share = (deadline - tick) / (len(chunks) - index) if deadline else None
+            solver = _run_solver(model, solver_name, share, gap if binding and not relax else None, threads)
+            solve_seconds += time.perf_counter() - tick
+            status = solver.status()
+            if status in (mbh.SolveStatus.OPTIMAL, mbh.SolveStatus.FEASIBLE):
+                statuses.append(status.name)
+                quantity[part] = np.round(np.asarray(solver.variable_values())[:layout["links"]], 2)
+                objective += solver.objective_value()
+                bound += solver.objective_value() if relax else solver.best_objective_bound()
+            elif seed is None and not relax:
+                # Out of time on an independent chunk: keep the chunks already solved, fill this one greedily
+                tick = time.perf_counter()
+                chunk_bound, plan = greedy_plan(forecast[first:last], sku_of[part] - first, cost[part],
+                                                moq[part], upper[part], np.inf)
+                solve_seconds += time.perf_counter() - tick
+                statuses.append("FEASIBLE")
+                greedy_chunks += 1
+                quantity[part] = plan
+                objective += cost[part] @ plan + shortfall_penalty(cost[part]) * (forecast[first:last].sum() - plan.sum())
+                bound += chunk_bound
+            else:
+                statuses.append(status.name)
+                quantity = objective = bound = None
+                break
+
+        if seed is not None:
+            # Keep the greedy plan if the solver ran out of time without beating it
+            if objective is None or seed_objective < objective:
+                quantity, objective, statuses = seed, seed_objective, ["FEASIBLE"]
+            bound = max(bound or -np.inf, seed_bound)
+
+    status = "OPTIMAL" if set(statuses) == {"OPTIMAL"} else next(s for s in statuses if s != "OPTIMAL")
+    has_solution = objective is not None
+    rows, cost_total = [], None
+    if has_solution:
+        plan = links.assign(Forecast=forecast[sku_of], Allocated=quantity)
+        plan = plan[plan["Allocated"] > 0]
+        plan = plan.assign(
+            Unit_Cost=plan["Unit_Cost"].fillna(0),
+            Total_Cost=(plan["Allocated"] * plan["Unit_Cost"].fillna(0)).round(2),
+        ).sort_values(["SKU", "Unit_Cost", "Supplier_ID"])
+        rows = plan[["SKU", "Forecast", "Allocated", "Supplier_ID", "Supplier_Name", "Unit_Cost", "Total_Cost"]] \
+            .to_dict(orient="records")
+        cost_total = float(plan["Total_Cost"].sum())
+
+    bought = float(quantity.sum()) if has_solution else None
+    return rows, {
+        "status": status,
+        "solver": solver_name,
+        "relaxed": bool(relax),
+        "capacity_binding": bool(binding),
+        "chunks": len(chunks),
+        "greedy_chunks": greedy_chunks,
+        "total_cost": round(cost_total, 2) if cost_total is not None else None,
+        "allocated": bought,
+        "demand": float(forecast.sum()),
+        "shortfall": float(forecast.sum() - bought) if bought is not None else None,
+        "gap": float(abs(objective - bound) / max(abs(objective), 1e-9)) if has_solution else None,
+        "skus": len(demand),
+        "links": len(links),
+        "moq_links": int(((moq > 0) & (upper > 0)).sum()),
+        "variables": variables,
+        "constraints": constraints,
+        "build_seconds": round(build_seconds, 4),
+        "solve_seconds": round(solve_seconds, 4),
+        "seconds": round(time.perf_counter() - started, 4),
+    }
@@ -0,0 +1,35 @@
+# utils/summaries.py
+import sqlalchemy as sa
+from models import db, Demand, Inventory, DemandBySku, DemandBySkuRegion, StockBySkuRegion
+
+demand, inventory = Demand.__table__, Inventory.__table__
+
+# summary model → aggregate over its raw table, keyed by the raw table it is derived from
+SUMMARIES = {
+    "demand": {
+        DemandBySku: sa.select(
+            demand.c.sku, sa.func.sum(demand.c.forecast), sa.func.sum(demand.c.actual),
+        ).group_by(demand.c.sku),
+        DemandBySkuRegion: sa.select(
+            demand.c.sku, demand.c.region, sa.func.sum(demand.c.forecast), sa.func.sum(demand.c.actual),
+        ).group_by(demand.c.sku, demand.c.region),
+    },
+    "inventory": {
+        StockBySkuRegion: sa.select(
+            inventory.c.sku, inventory.c.region, sa.func.sum(inventory.c.stock),
+        ).group_by(inventory.c.sku, inventory.c.region),
+    },
+}
+
+
+def refresh_summaries(table_names):
+    """
+    Rebuild the summary tables derived from `table_names` (caller commits).
+    Runs in the caller's transaction, so readers switch to new raw rows and
+    new summaries in the same commit.
+    """
+    for name in table_names:
+        for model, aggregate in SUMMARIES.get(name, {}).items():
+            summary = model.__table__
+            db.session.execute(summary.delete())
+            db.session.execute(summary.insert().from_select([c.name for c in summary.columns], aggregate))
@@ -0,0 +1,122 @@
+# utils/workers.py
+import math
+import os
+import tempfile
+import threading
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from multiprocessing import get_context
+
+FLAG_POLL_SECONDS = 0.2   # how often pool work checks for its cancel flag
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def worker_pool(workers):
+    """
+    Long-lived spawned pool per worker count: spawning and importing
+    statsmodels / OR-Tools costs seconds per process, so it is paid once.
+    Callers pass their configured size (Config.*_WORKERS), never a
+    client-chosen one, so each process keeps one pool per kind of work.
+    """
+    with _pools_lock:
+        pool = _pools.get(workers)
+        if pool is None:
+            pool = _pools[workers] = ProcessPoolExecutor(max_workers=workers, mp_context=get_context("spawn"))
+        return pool
+
+
+def discard_pool(workers):
+    """Drop a broken pool (a worker died); the next call starts a fresh one."""
+    with _pools_lock:
+        _pools.pop(workers, None)
+
+
+def split_batches(items, workers, pool_size):
+    """
+    Batches for `workers` processes of a `pool_size` pool: several per worker
+    when the whole pool is used, so one slow batch doesn't leave the others
+    idle; one per worker otherwise, so no more than `workers` run at once.
+    """
+    count = workers * 4 if workers >= pool_size else workers
+    size = max(1, math.ceil(len(items) / count))
+    return [items[i:i + size] for i in range(0, len(items), size)]
+
+
+# ---------------- Cancellation ----------------
+class CancelToken:
+    """
+    Handed to cancellable jobs as `cancel`. Check `cancelled` between steps;
+    wrap a blocking call in `hook(interrupt)` so a cancel interrupts it.
+    """
+
+    def __init__(self):
+        self._event = threading.Event()
+        self._hooks = []
+        self._lock = threading.Lock()
+
+    @property
+    def cancelled(self):
+        return self._event.is_set()
+
+    def cancel(self):
+        with self._lock:
+            self._event.set()
+            hooks = list(self._hooks)
+        for interrupt in hooks:
+            interrupt()
+
+    @contextmanager
+    def hook(self, interrupt):
+        with self._lock:
+            self._hooks.append(interrupt)
+            already = self._event.is_set()
+        if already:
+            interrupt()
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._hooks.remove(interrupt)
+
+
+@contextmanager
+def cancel_flag(cancel):
+    """
+    Carry `cancel` into pool processes: yields a flag file path that is
+    created when `cancel` trips (None without a token). Pool work watches
+    it with flag_token.
+    """
+    if cancel is None:
+        yield None
+        return
+    path = os.path.join(tempfile.gettempdir(), f"freshbites_cancel_{uuid.uuid4().hex}")
+    try:
+        with cancel.hook(lambda: open(path, "w").close()):
+            yield path
+    finally:
+        if os.path.exists(path):
+            os.remove(path)
+
+
+@contextmanager
+def flag_token(path):
+    """In a pool process: a CancelToken that trips once the flag file at `path` exists."""
+    if path is None:
+        yield None
+        return
+    token, stop = CancelToken(), threading.Event()
+
+    def watch():
+        while not stop.wait(FLAG_POLL_SECONDS):
+            if os.path.exists(path):
+                token.cancel()
+                return
+
+    threading.Thread(target=watch, daemon=True).start()
+    try:
+        yield token
+    finally:
+        stop.set()